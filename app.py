@@ -4,14 +4,42 @@ Modern SPA Flask App - Shift Scheduler
 Self-contained application with all classes and functions included.
 """
 
-from flask import Flask, render_template_string, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template_string, jsonify, request, send_from_directory, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 import os
+import base64
+import csv
+import gzip
+import io
+import json
+import mimetypes
+import queue
+import re
+import sqlite3
+import hashlib
+import heapq
+import threading
+import time
+import uuid
+import math
+import multiprocessing
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import timedelta, datetime, date
 from werkzeug.security import generate_password_hash, check_password_hash
 from ortools.sat.python import cp_model
+from sqlalchemy import event, delete, insert, inspect, or_, select, text, tuple_, update
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import contains_eager
 
-app = Flask(__name__)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# static/ is served by static_files below (cached, content-hashed)
+app = Flask(__name__, static_folder=None)
 
 # Configuration
 config_name = os.getenv('FLASK_ENV', 'development')
@@ -28,10 +56,87 @@ else:
     app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///instance/scheduler.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    try:
+        from config import DevelopmentConfig
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = DevelopmentConfig.SQLALCHEMY_ENGINE_OPTIONS
+        app.config['SQLITE_PRAGMAS'] = DevelopmentConfig.SQLITE_PRAGMAS
+    except ImportError:
+        pass
+
+# Database engine tuning (pool sizes and SQLite pragmas, see config.py)
+app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {'pool_size': 5, 'max_overflow': 5, 'pool_pre_ping': True})
+app.config.setdefault('SQLITE_PRAGMAS', {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000})
+
+# Solver configuration (per-request `constraints` may override these)
+app.config.setdefault('SOLVER_TIME_LIMIT_SECONDS', float(os.environ.get('SOLVER_TIME_LIMIT_SECONDS', 30)))
+app.config.setdefault('SOLVER_MAX_TIME_LIMIT_SECONDS', float(os.environ.get('SOLVER_MAX_TIME_LIMIT_SECONDS', 120)))
+app.config.setdefault('SOLVER_NUM_WORKERS', int(os.environ.get('SOLVER_NUM_WORKERS', os.cpu_count() or 1)))
+app.config.setdefault('SOLVER_RELATIVE_GAP', float(os.environ.get('SOLVER_RELATIVE_GAP', 0.0)))
+app.config.setdefault('SOLVER_LINEARIZATION_LEVEL', int(os.environ.get('SOLVER_LINEARIZATION_LEVEL', 2)))
+
+# Background schedule-generation jobs
+app.config.setdefault('SCHEDULE_JOBS_ASYNC', True)
+app.config.setdefault('SCHEDULE_JOB_WORKERS', int(os.environ.get('SCHEDULE_JOB_WORKERS', 2)))
+app.config.setdefault('SCHEDULE_JOB_HISTORY', 100)
+
+# Generated schedule result cache
+app.config.setdefault('SCHEDULE_CACHE_SIZE', int(os.environ.get('SCHEDULE_CACHE_SIZE', 64)))
+
+# Serialized /api/employees and /api/schedules responses (one entry per week)
+app.config.setdefault('RESPONSE_CACHE_SIZE', int(os.environ.get('RESPONSE_CACHE_SIZE', 64)))
+
+# Schedule history export: page size for JSON pages, rows per streamed chunk
+app.config.setdefault('EXPORT_PAGE_SIZE', 1000)
+app.config.setdefault('EXPORT_MAX_PAGE_SIZE', 10000)
+app.config.setdefault('EXPORT_STREAM_BATCH', 1000)
+
+# Server-sent schedule change events: per-client queue bound and keep-alive interval.
+# Every open stream holds a worker thread, so EVENT_MAX_STREAMS must stay below
+# the gunicorn --threads count (16 in the Procfile) to leave room for API calls.
+app.config.setdefault('EVENT_QUEUE_SIZE', 32)
+app.config.setdefault('EVENT_HEARTBEAT_SECONDS', 15)
+app.config.setdefault('EVENT_MAX_STREAMS', int(os.environ.get('EVENT_MAX_STREAMS', 8)))
+
+# Multi-week horizon scheduling
+app.config.setdefault('SCHEDULE_MAX_HORIZON_WEEKS', 12)
+app.config.setdefault('SCHEDULE_DECOMPOSE_WEEKS', 4)
+
+# Incremental repair of published weeks
+app.config.setdefault('SCHEDULE_REPAIR_TIME_LIMIT_SECONDS', 1.0)
+app.config.setdefault('SCHEDULE_REPAIR_CANDIDATES', 50)
+
+# Bulk employee import: password hashing moves to a process pool from this many rows
+app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+app.config.setdefault('PASSWORD_HASH_POOL_THRESHOLD', 16)
+
+# SPA shell and static assets are read and compressed once; set False to
+# re-read them on every request while editing
+app.config.setdefault('STATIC_ASSET_CACHE', True)
+
+# In-memory SQLite runs on a single shared connection (StaticPool), which takes
+# no pool sizing options; those only apply to file-backed and server databases
+POOL_SIZING_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+_database_url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+if _database_url.get_backend_name() == 'sqlite' and (
+        _database_url.database in (None, '', ':memory:') or _database_url.query.get('mode') == 'memory'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        name: value for name, value in app.config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+        if name not in POOL_SIZING_OPTIONS
+    }
 
 # Initialize database
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
 # Database Models
 class User(db.Model):
     __tablename__ = 'users'
@@ -48,13 +153,24 @@ class User(db.Model):
     max_hours_per_week = db.Column(db.Integer, default=40)
     can_work_weekends = db.Column(db.Boolean, default=True)
     preferred_shift_type = db.Column(db.String(20), default='any')  # 'opening', 'midday', 'closing', 'any'
+    # Department or location; departments never share staff and are scheduled separately
+    department = db.Column(db.String(50))
     
     # Availability (JSON string format)
     availability = db.Column(db.Text)  # Will store JSON of weekly availability
+    # Parsed availability: bit (day * 3 + shift) set when the slot can be worked, NULL = always available
+    availability_mask = db.Column(db.Integer)
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
+    def set_availability(self, availability):
+        """Store availability JSON together with its parsed bitmask"""
+        if isinstance(availability, dict):
+            availability = json.dumps(availability)
+        self.availability = availability or None
+        self.availability_mask = parse_availability(self.availability, load_shift_templates())
+    
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
@@ -69,215 +185,2491 @@ class User(db.Model):
             'max_hours_per_week': self.max_hours_per_week,
             'can_work_weekends': self.can_work_weekends,
             'preferred_shift_type': self.preferred_shift_type,
+            'department': self.department,
             'availability': self.availability
         }
 
-class Schedule(db.Model):
-    __tablename__ = 'schedules'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
-    shift_type = db.Column(db.String(20), nullable=False)  # 'opening', 'midday', 'closing'
-    start_time = db.Column(db.String(8), nullable=False)   # Format: "HH:MM"
-    end_time = db.Column(db.String(8), nullable=False)     # Format: "HH:MM"
-    hours = db.Column(db.Float, nullable=False)
+class Schedule(db.Model):
+    __tablename__ = 'schedules'
+    __table_args__ = (
+        # Week listings filter by date and order by (date, start_time);
+        # per-employee views and deletes filter by user_id
+        db.Index('ix_schedules_date_start_time', 'date', 'start_time'),
+        db.Index('ix_schedules_user_id_date', 'user_id', 'date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    shift_type = db.Column(db.String(20), nullable=False)  # Shift template name, e.g. 'opening'
+    start_time = db.Column(db.String(8), nullable=False)   # Format: "HH:MM"
+    end_time = db.Column(db.String(8), nullable=False)     # Format: "HH:MM"
+    hours = db.Column(db.Float, nullable=False)
+    
+    # Relationship
+    user = db.relationship('User', backref=db.backref('schedules', lazy=True))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'user_name': self.user.name if self.user else 'Unknown',
+            'date': self.date.isoformat(),
+            'shift_type': self.shift_type,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'hours': self.hours
+        }
+
+class ShiftTemplate(db.Model):
+    """A named shift; an end time before the start time runs past midnight"""
+    __tablename__ = 'shift_templates'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(20), unique=True, nullable=False)
+    start_time = db.Column(db.String(8), nullable=False)   # Format: "HH:MM"
+    end_time = db.Column(db.String(8), nullable=False)     # Format: "HH:MM"
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'hours': calculate_shift_hours(self.start_time, self.end_time)
+        }
+
+class StaffingDemand(db.Model):
+    """Headcount needed for one shift on a weekday, or on a single date"""
+    __tablename__ = 'staffing_demand'
+    __table_args__ = (
+        # A row is either a weekday default or a date override (which wins)
+        db.Index('ix_staffing_demand_weekday_shift', 'day_of_week', 'shift_type', unique=True),
+        db.Index('ix_staffing_demand_date_shift', 'date', 'shift_type', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day_of_week = db.Column(db.Integer)   # 0 = Monday; NULL for date overrides
+    date = db.Column(db.Date)             # NULL for weekday defaults
+    shift_type = db.Column(db.String(20), nullable=False)
+    min_staff = db.Column(db.Integer, nullable=False, default=1)
+    max_staff = db.Column(db.Integer)     # NULL = no upper limit
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'day': self.date.isoformat() if self.date else DAYS[self.day_of_week],
+            'shift_type': self.shift_type,
+            'min_staff': self.min_staff,
+            'max_staff': self.max_staff
+        }
+
+# Core utility functions
+def get_week_dates(week_offset=0):
+    """Get start and end dates for a given week offset from current week"""
+    today = date.today()
+    days_since_monday = today.weekday()
+    monday = today - timedelta(days=days_since_monday)
+    week_start = monday + timedelta(weeks=week_offset)
+    week_end = week_start + timedelta(days=6)
+    return week_start, week_end
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+STANDARD_SHIFTS = ['opening', 'midday', 'closing']
+FULL_AVAILABILITY = (1 << (len(DAYS) * len(STANDARD_SHIFTS))) - 1
+
+def parse_availability(availability, templates=()):
+    """
+    Parse availability JSON into a day x shift bitmask.
+    
+    The JSON maps lowercase day names to a list of shift types, or to
+    true/false for the whole day, e.g. {"monday": ["opening"], "sunday": false}.
+    Days that are not listed stay fully available. Lists may name the
+    standard shifts and any of `templates`; the bitmask only covers the
+    standard shifts, other templates are read from the JSON (see
+    template_availability). Returns None (available for everything) when no
+    availability is set.
+    """
+    if not availability:
+        return None
+    
+    data = json.loads(availability) if isinstance(availability, str) else availability
+    if not isinstance(data, dict):
+        raise ValueError('Availability must be an object keyed by day name')
+    
+    mask = FULL_AVAILABILITY
+    all_shifts = (1 << len(STANDARD_SHIFTS)) - 1
+    for day_name, shifts in data.items():
+        if day_name.lower() not in DAYS:
+            raise ValueError(f'Unknown day in availability: {day_name}')
+        day_idx = DAYS.index(day_name.lower())
+        
+        if shifts is True or shifts in ('all', 'any'):
+            day_bits = all_shifts
+        elif not shifts:
+            day_bits = 0
+        elif not isinstance(shifts, list):
+            raise ValueError(f'Availability for {day_name} must be a list of shifts or true/false')
+        else:
+            day_bits = 0
+            for shift in shifts:
+                if shift in STANDARD_SHIFTS:
+                    day_bits |= 1 << STANDARD_SHIFTS.index(shift)
+                elif shift not in templates:
+                    raise ValueError(f'Unknown shift in availability: {shift}')
+        
+        offset = day_idx * len(STANDARD_SHIFTS)
+        mask = (mask & ~(all_shifts << offset)) | (day_bits << offset)
+    
+    return None if mask == FULL_AVAILABILITY else mask
+
+def template_availability(availability, shift):
+    """
+    Per weekday, whether availability JSON allows a shift that is not one of
+    STANDARD_SHIFTS: days that are unlisted or true allow it, a list only
+    when it names the shift
+    """
+    data = json.loads(availability) if isinstance(availability, str) else availability or {}
+    days = {day.lower(): value for day, value in data.items()}
+    return [
+        days.get(day) is None or days[day] is True or days[day] in ('all', 'any') or
+        (isinstance(days[day], list) and shift in days[day])
+        for day in DAYS
+    ]
+
+def calculate_shift_hours(start_time, end_time):
+    """Calculate hours between two time strings"""
+    start = datetime.strptime(start_time, "%H:%M")
+    end = datetime.strptime(end_time, "%H:%M")
+    
+    # Handle overnight shifts
+    if end < start:
+        end += timedelta(days=1)
+    
+    delta = end - start
+    return delta.total_seconds() / 3600
+
+def get_solver_parameters(constraints=None):
+    """Resolve CP-SAT parameters from app config and per-request constraints; raises ValueError"""
+    constraints = constraints or {}
+    
+    def number(name, default, kind):
+        value = constraints.get(name, default)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+        if isinstance(constraints.get(name), bool) or not math.isfinite(value):
+            raise ValueError(f'{name} must be a number')
+        if kind is int and not value.is_integer():
+            raise ValueError(f'{name} must be a whole number')
+        return kind(value)
+    
+    time_limit = number('time_limit_seconds', app.config['SOLVER_TIME_LIMIT_SECONDS'], float)
+    time_limit = min(max(time_limit, 0.1), app.config['SOLVER_MAX_TIME_LIMIT_SECONDS'])
+    
+    num_workers = number('num_workers', app.config['SOLVER_NUM_WORKERS'], int)
+    num_workers = max(1, min(num_workers, os.cpu_count() or 1))
+    
+    relative_gap = number('relative_gap', app.config['SOLVER_RELATIVE_GAP'], float)
+    relative_gap = max(relative_gap, 0.0)
+    
+    # Level 2 linearizes the coverage clauses, which the objective bound needs
+    linearization_level = number('linearization_level', app.config['SOLVER_LINEARIZATION_LEVEL'], int)
+    linearization_level = min(max(linearization_level, 0), 2)
+    
+    return {
+        'time_limit_seconds': time_limit,
+        'num_workers': num_workers,
+        'relative_gap': relative_gap,
+        'linearization_level': linearization_level
+    }
+
+def create_solver(parameters):
+    """Create a CP-SAT solver configured with the given parameters"""
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = parameters['time_limit_seconds']
+    solver.parameters.num_workers = parameters['num_workers']
+    solver.parameters.relative_gap_limit = parameters['relative_gap']
+    solver.parameters.linearization_level = parameters['linearization_level']
+    return solver
+
+class ScheduleSolutionCallback(cp_model.CpSolverSolutionCallback):
+    """Report intermediate CP-SAT solutions and stop the search on request"""
+    
+    def __init__(self, extract_solution, on_solution=None, should_stop=None):
+        super().__init__()
+        self.extract_solution = extract_solution
+        self.on_solution = on_solution
+        self.should_stop = should_stop
+        self.solution_count = 0
+    
+    def on_solution_callback(self):
+        self.solution_count += 1
+        if self.on_solution:
+            self.on_solution({
+                'solutions': self.solution_count,
+                'objective_value': self.ObjectiveValue(),
+                'best_objective_bound': self.BestObjectiveBound(),
+                'wall_time': self.WallTime(),
+                'schedules': self.extract_solution(self.Value)
+            })
+        if self.should_stop and self.should_stop():
+            self.StopSearch()
+
+# How often a running solve checks whether its job was cancelled
+CANCEL_POLL_SECONDS = 0.2
+
+@contextmanager
+def stop_solver_when(solver, should_stop):
+    """
+    Poll `should_stop` from a watcher thread while the block runs and stop
+    the solver once it returns True. The solution callback alone would
+    miss a cancel while CP-SAT has no solution yet or is only proving bounds.
+    """
+    if should_stop is None:
+        yield
+        return
+    
+    done = threading.Event()
+    
+    def watch():
+        while not done.wait(CANCEL_POLL_SECONDS):
+            if should_stop():
+                solver.StopSearch()
+                return
+    
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        yield
+    finally:
+        done.set()
+        watcher.join()
+
+DEFAULT_SHIFT_DEFINITIONS = {
+    'opening': {'start': '08:00', 'end': '16:00'},
+    'midday': {'start': '12:00', 'end': '20:00'},
+    'closing': {'start': '16:00', 'end': '00:00'}
+}
+
+# (min_staff, max_staff) for shifts without a staffing_demand row
+DEFAULT_DEMAND = (1, None)
+
+def demand_for_days(demand, start_date, num_days, shifts):
+    """
+    Per-day lists of per-shift (min_staff, max_staff) from a demand table as
+    returned by load_staffing_demand. Date rows win over weekday rows.
+    """
+    demand = demand or {}
+    days = []
+    for day_idx in range(num_days):
+        day = start_date + timedelta(days=day_idx)
+        by_date = demand.get(day.isoformat(), {})
+        by_weekday = demand.get(DAYS[day.weekday()], {})
+        days.append([tuple(by_date.get(shift) or by_weekday.get(shift) or DEFAULT_DEMAND) for shift in shifts])
+    return days
+
+def get_horizon_weeks(constraints=None):
+    """Number of weeks to schedule in one solve (constraints['horizon_weeks'])"""
+    weeks = int((constraints or {}).get('horizon_weeks', 1))
+    if weeks < 1 or weeks > app.config['SCHEDULE_MAX_HORIZON_WEEKS']:
+        raise ValueError(f"horizon_weeks must be between 1 and {app.config['SCHEDULE_MAX_HORIZON_WEEKS']}")
+    return weeks
+
+# Objective weights per reported unit: a non-preferred shift, an hour of spread
+# between employees, a shift above coverage and a change from the hinted schedule
+DEFAULT_OBJECTIVE_WEIGHTS = {'preference': 2, 'balance': 1, 'overstaffing': 10, 'disruption': 10}
+OBJECTIVE_SCALE = 100
+
+def get_objective_weights(constraints=None):
+    """Objective weights from constraints['objective_weights'] over the defaults"""
+    requested = (constraints or {}).get('objective_weights') or {}
+    if not isinstance(requested, dict):
+        raise ValueError('objective_weights must be an object')
+    weights = dict(DEFAULT_OBJECTIVE_WEIGHTS)
+    for name, weight in requested.items():
+        if name not in weights:
+            raise ValueError(f"Unknown objective term '{name}'")
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"Weight for '{name}' must be a non-negative number")
+        weights[name] = weight
+    return weights
+
+SOLVER_MODES = ('cp_sat', 'heuristic')
+
+def get_solver_mode(constraints=None):
+    """Scheduling engine from constraints['mode']: 'cp_sat' (default) or 'heuristic'"""
+    mode = (constraints or {}).get('mode', 'cp_sat')
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(SOLVER_MODES)}")
+    return mode
+
+def parse_shift_time(value):
+    """Normalize an "H:MM" or "HH:MM" time to "HH:MM"; raises ValueError"""
+    try:
+        hour, minute = (int(part) for part in str(value).split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    return f'{hour:02d}:{minute:02d}'
+
+def get_shift_definitions(constraints=None, templates=None):
+    """
+    Shift templates (DEFAULT_SHIFT_DEFINITIONS unless given) merged with
+    constraints['shift_definitions'], and the shift names ordered by start
+    time. Raises ValueError for malformed definitions.
+    """
+    shift_definitions = dict(templates or DEFAULT_SHIFT_DEFINITIONS)
+    shift_definitions.update((constraints or {}).get('shift_definitions') or {})
+    for shift, definition in shift_definitions.items():
+        if not isinstance(definition, dict) or \
+                parse_shift_time(definition.get('start')) == parse_shift_time(definition.get('end')):
+            raise ValueError(f"Shift '{shift}' needs different start and end times")
+    
+    shifts = sorted(shift_definitions, key=lambda shift: (shift_minutes_of_day(shift_definitions[shift]), shift))
+    return shift_definitions, shifts
+
+def shift_minutes_of_day(shift_definition):
+    """Start and end of a shift in minutes after midnight of its own day"""
+    start_hour, start_minute = map(int, shift_definition['start'].split(':'))
+    end_hour, end_minute = map(int, shift_definition['end'].split(':'))
+    start = start_hour * 60 + start_minute
+    end = end_hour * 60 + end_minute
+    if end < start:
+        end += 24 * 60
+    return start, end
+
+def shift_interval_index(shift_definitions, shifts, num_days):
+    """
+    Every shift instance as (start, end, day_idx, shift_idx), in minutes from
+    midnight of day 0, sorted by start
+    """
+    bounds = [shift_minutes_of_day(shift_definitions[shift]) for shift in shifts]
+    return sorted(
+        (day_idx * 24 * 60 + start, day_idx * 24 * 60 + end, day_idx, shift_idx)
+        for day_idx in range(num_days)
+        for shift_idx, (start, end) in enumerate(bounds)
+    )
+
+def conflict_cliques(shift_definitions, shifts, num_days, min_rest_hours=0):
+    """
+    Maximal groups of (day_idx, shift_idx) instances that pairwise overlap or
+    leave less than `min_rest_hours` between them; an employee can work at
+    most one shift of each group.
+    
+    Two instances conflict exactly when their intervals overlap once each end
+    is pushed back by the rest period, so the conflicts form an interval
+    graph and one sweep over the interval index yields its maximal cliques.
+    """
+    rest = int(min_rest_hours * 60)
+    cliques = []
+    active = set()
+    ending = []
+    grown = False
+    for start, end, day_idx, shift_idx in shift_interval_index(shift_definitions, shifts, num_days):
+        while ending and ending[0][0] <= start:
+            # The active set is a maximal clique right before its first removal
+            if grown and len(active) > 1:
+                cliques.append(sorted(active))
+            grown = False
+            active.discard(heapq.heappop(ending)[1])
+        active.add((day_idx, shift_idx))
+        heapq.heappush(ending, (end + rest, (day_idx, shift_idx)))
+        grown = True
+    if grown and len(active) > 1:
+        cliques.append(sorted(active))
+    return cliques
+
+def shift_conflict_masks(shift_definitions, shifts, min_rest_hours=0):
+    """
+    For each shift, [(day_offset, shift bitmask)] of the instances it overlaps
+    (including itself at offset 0) and of those leaving too little rest
+    """
+    rest = int(min_rest_hours * 60)
+    bounds = [shift_minutes_of_day(shift_definitions[shift]) for shift in shifts]
+    reach = (max(end for _, end in bounds) + rest) // (24 * 60) + 1
+    overlaps = []
+    rests = []
+    for first_start, first_end in bounds:
+        overlap = {}
+        short_rest = {}
+        for offset in range(-reach, reach + 1):
+            for other, (start, end) in enumerate(bounds):
+                start += offset * 24 * 60
+                end += offset * 24 * 60
+                if start < first_end and first_start < end:
+                    overlap[offset] = overlap.get(offset, 0) | 1 << other
+                elif start < first_end + rest and first_start < end + rest:
+                    short_rest[offset] = short_rest.get(offset, 0) | 1 << other
+        overlaps.append(sorted(overlap.items()))
+        rests.append(sorted(short_rest.items()))
+    return overlaps, rests
+
+class ShiftModel:
+    """
+    CP-SAT model over a flat employee x day x shift variable tensor.
+    
+    Variable (e, d, s) lives at index (e * num_days + d) * num_shifts + s, and
+    shift durations are computed once as integer minute coefficients.
+    Assignments that are 0 in the flat `allowed` mask (see presolve_assignments)
+    get no variable at all: the tensor holds None there and constraints skip it.
+    """
+    
+    def __init__(self, employees, shift_definitions, shifts, num_days=7, start_weekday=0, allowed=None):
+        self.employees = employees
+        self.shift_definitions = shift_definitions
+        self.shifts = shifts
+        self.num_days = num_days
+        self.start_weekday = start_weekday
+        self.num_shifts = len(shifts)
+        self.shift_hours = [
+            calculate_shift_hours(shift_definitions[shift]['start'], shift_definitions[shift]['end'])
+            for shift in shifts
+        ]
+        self.shift_minutes = [int(round(hours * 60)) for hours in self.shift_hours]
+        
+        self.model = cp_model.CpModel()
+        size = len(employees) * num_days * self.num_shifts
+        if allowed is None:
+            self.x = [self.model.NewBoolVar('') for _ in range(size)]
+        else:
+            self.x = [self.model.NewBoolVar('') if ok else None for ok in allowed]
+        self.eliminated = sum(var is None for var in self.x)
+        self.fixed_days = 0
+        # Objective terms: name -> (linear expression, reported units per raw unit)
+        self.terms = {}
+    
+    def index(self, emp_idx, day_idx, shift_idx):
+        return (emp_idx * self.num_days + day_idx) * self.num_shifts + shift_idx
+    
+    def var(self, emp_idx, day_idx, shift_idx):
+        return self.x[self.index(emp_idx, day_idx, shift_idx)]
+    
+    def day_vars(self, emp_idx, day_idx):
+        """Variables for one employee-day, with None for eliminated shifts"""
+        first = self.index(emp_idx, day_idx, 0)
+        return self.x[first:first + self.num_shifts]
+    
+    def slot_vars(self, day_idx, shift_idx):
+        stride = self.num_days * self.num_shifts
+        return [var for var in self.x[self.index(0, day_idx, shift_idx)::stride] if var is not None]
+    
+    def window_terms(self, emp_idx, first_day, days=7):
+        """Variables and minute coefficients for `days` days of one employee"""
+        first = self.index(emp_idx, first_day, 0)
+        window = self.x[first:first + days * self.num_shifts]
+        variables = []
+        coefficients = []
+        for i, var in enumerate(window):
+            if var is not None:
+                variables.append(var)
+                coefficients.append(self.shift_minutes[i % self.num_shifts])
+        return variables, coefficients
+    
+    def fix_days(self, num_days, assignments):
+        """Pin the first `num_days` days to a set of (user_id, day_idx, shift_type)"""
+        self.fixed_days = num_days
+        for emp_idx, emp in enumerate(self.employees):
+            for day_idx in range(num_days):
+                for shift_idx, shift in enumerate(self.shifts):
+                    self.model.Add(self.var(emp_idx, day_idx, shift_idx) == int((emp.id, day_idx, shift) in assignments))
+    
+    def free_vars(self, emp_idx):
+        """Variables of one employee on the days that are not fixed"""
+        return [
+            var for var in self.x[self.index(emp_idx, self.fixed_days, 0):self.index(emp_idx + 1, 0, 0)]
+            if var is not None
+        ]
+    
+    def add_hints(self, hints, minimal_disruption=False):
+        """
+        Hint every variable from a set of (user_id, day_idx, shift_type)
+        assignments; with `minimal_disruption` also add a 'disruption' objective
+        term counting assignments that differ from the hint. Returns the hinted
+        shift count.
+        """
+        variables = []
+        coefficients = []
+        hinted = 0
+        for emp_idx, emp in enumerate(self.employees):
+            for day_idx in range(self.num_days):
+                for shift_idx, shift in enumerate(self.shifts):
+                    assigned = (emp.id, day_idx, shift) in hints
+                    hinted += assigned
+                    var = self.var(emp_idx, day_idx, shift_idx)
+                    if var is None:
+                        continue
+                    self.model.AddHint(var, assigned)
+                    variables.append(var)
+                    coefficients.append(-1 if assigned else 1)
+        
+        if minimal_disruption:
+            # Hinted shifts without a variable count as one change each
+            self.terms['disruption'] = (cp_model.LinearExpr.WeightedSum(variables, coefficients) + hinted, 1)
+        return hinted
+    
+    def add_preference_term(self):
+        """Count assigned shifts that are not the employee's preferred shift"""
+        variables = []
+        for emp_idx, emp in enumerate(self.employees):
+            preference = emp.preferred_shift_type
+            if preference not in self.shifts:
+                continue
+            for day_idx in range(self.fixed_days, self.num_days):
+                for shift_idx, var in enumerate(self.day_vars(emp_idx, day_idx)):
+                    if var is not None and self.shifts[shift_idx] != preference:
+                        variables.append(var)
+        self.terms['preference'] = (cp_model.LinearExpr.Sum(variables), 1)
+    
+    def add_balance_term(self):
+        """
+        Spread between the most and least scheduled employees, in units of the
+        greatest common divisor of the shift lengths (reported in hours).
+        Employees who cannot take any shift are left out.
+        """
+        unit = math.gcd(*self.shift_minutes) or 1
+        totals = []
+        upper = 0
+        for emp_idx in range(len(self.employees)):
+            variables, coefficients = self.window_terms(emp_idx, self.fixed_days, self.num_days - self.fixed_days)
+            if not variables:
+                continue
+            coefficients = [minutes // unit for minutes in coefficients]
+            total = self.model.NewIntVar(0, sum(coefficients), '')
+            self.model.Add(total == cp_model.LinearExpr.WeightedSum(variables, coefficients))
+            totals.append(total)
+            upper = max(upper, sum(coefficients))
+        if len(totals) < 2:
+            return
+        
+        highest = self.model.NewIntVar(0, upper, '')
+        lowest = self.model.NewIntVar(0, upper, '')
+        self.model.AddMaxEquality(highest, totals)
+        self.model.AddMinEquality(lowest, totals)
+        self.terms['balance'] = (highest - lowest, unit / 60)
+    
+    def add_overstaffing_term(self, required):
+        """Number of assigned shifts above the `required` coverage"""
+        variables = [var for emp_idx in range(len(self.employees)) for var in self.free_vars(emp_idx)]
+        self.terms['overstaffing'] = (cp_model.LinearExpr.Sum(variables) - required, 1)
+    
+    def set_objective(self, weights):
+        """
+        Minimize the weighted sum of the objective terms. Weights are per
+        reported unit and are scaled to integer coefficients.
+        """
+        objective = []
+        for name, (expr, per_unit) in self.terms.items():
+            coefficient = int(round(weights.get(name, 0) * OBJECTIVE_SCALE * per_unit))
+            if coefficient:
+                objective.append(coefficient * expr)
+        if objective:
+            self.model.Minimize(sum(objective))
+    
+    def objective_report(self, value, weights):
+        """Per-term values in reported units, with their weighted contribution"""
+        report = {}
+        for name, (expr, per_unit) in self.terms.items():
+            term_value = value(expr) * per_unit
+            report[name] = {
+                'value': term_value,
+                'weight': weights.get(name, 0),
+                'weighted': term_value * weights.get(name, 0)
+            }
+        return report
+    
+    def assignments(self, value):
+        """Yield (emp_idx, day_idx, shift_idx) for every variable set to 1"""
+        per_employee = self.num_days * self.num_shifts
+        for i, var in enumerate(self.x):
+            if var is not None and value(var):
+                emp_idx, rest = divmod(i, per_employee)
+                day_idx, shift_idx = divmod(rest, self.num_shifts)
+                yield emp_idx, day_idx, shift_idx
+
+def presolve_assignments(employees, shift_definitions, shifts, num_days=7, start_weekday=0,
+                         fixed_days=0, hard_preferences=False, demand=None):
+    """
+    Work out which (employee, day, shift) assignments are possible at all.
+    
+    An assignment is pruned when it falls on a weekend for someone who can't
+    work weekends, is outside their availability (the bitmask for the
+    standard three shifts, the JSON for other templates), is
+    not their preferred shift (only with `hard_preferences`), or is longer
+    than their weekly hour cap.
+    Days before `fixed_days` (carried-in history) are never pruned.
+    `demand` gives per-day (min_staff, max_staff) per shift (see
+    demand_for_days); by default every shift needs one employee.
+    
+    Returns a dict with the flat `allowed` mask in ShiftModel order, pruned
+    counts per reason, and `diagnostics` describing coverage that no solver
+    could satisfy.
+    """
+    num_shifts = len(shifts)
+    shift_minutes = [
+        int(round(calculate_shift_hours(shift_definitions[shift]['start'], shift_definitions[shift]['end']) * 60))
+        for shift in shifts
+    ]
+    if demand is None:
+        demand = [[DEFAULT_DEMAND] * num_shifts] * num_days
+    # Availability bits per standard shift; other templates are looked up per employee
+    bits = [1 << STANDARD_SHIFTS.index(shift) if shift in STANDARD_SHIFTS else None for shift in shifts]
+    
+    pruned = {'weekend': 0, 'availability': 0, 'preference': 0, 'hours': 0}
+    coverage = [[0] * num_shifts for _ in range(7)]
+    weekly_capacity = 0
+    allowed = bytearray()
+    open_day = b'\x01' * num_shifts
+    
+    for emp in employees:
+        cap = (emp.max_hours_per_week or 40) * 60
+        mask = emp.availability_mask
+        preference = emp.preferred_shift_type if hard_preferences else None
+        custom = {
+            s: template_availability(emp.availability, shifts[s])
+            for s in range(num_shifts) if bits[s] is None and emp.availability
+        }
+        
+        # Every day with the same weekday gets the same pattern
+        patterns = []
+        reasons = []
+        for weekday in range(7):
+            pattern = bytearray(num_shifts)
+            day_reasons = [None] * num_shifts
+            for s in range(num_shifts):
+                if weekday >= 5 and not emp.can_work_weekends:
+                    day_reasons[s] = 'weekend'
+                elif not (custom[s][weekday] if s in custom else
+                          mask is None or bits[s] is None or mask >> (weekday * len(STANDARD_SHIFTS)) & bits[s]):
+                    day_reasons[s] = 'availability'
+                elif preference not in (None, '', 'any') and shifts[s] != preference:
+                    day_reasons[s] = 'preference'
+                elif shift_minutes[s] > cap:
+                    day_reasons[s] = 'hours'
+                else:
+                    pattern[s] = 1
+                    coverage[weekday][s] += 1
+            patterns.append(bytes(pattern))
+            reasons.append(day_reasons)
+        
+        for day_idx in range(num_days):
+            weekday = (start_weekday + day_idx) % 7
+            if day_idx < fixed_days:
+                allowed += open_day
+                continue
+            allowed += patterns[weekday]
+            for reason in reasons[weekday]:
+                if reason:
+                    pruned[reason] += 1
+        
+        # Most minutes this employee could contribute in any week
+        weekly_capacity += min(cap, sum(
+            minutes for pattern in patterns for ok, minutes in zip(pattern, shift_minutes) if ok
+        ))
+    
+    diagnostics = []
+    reported = set()
+    for day_idx in range(fixed_days, num_days):
+        weekday = (start_weekday + day_idx) % 7
+        for s, shift in enumerate(shifts):
+            needed = demand[day_idx][s][0]
+            available = coverage[weekday][s]
+            if available >= needed or (weekday, s, needed) in reported:
+                continue
+            reported.add((weekday, s, needed))
+            if available == 0:
+                diagnostics.append({
+                    'type': 'uncovered_shift',
+                    'day': DAYS[weekday],
+                    'shift_type': shift,
+                    'message': f'No employee can work the {shift} shift on {DAYS[weekday].title()}'
+                })
+            else:
+                diagnostics.append({
+                    'type': 'understaffed_shift',
+                    'day': DAYS[weekday],
+                    'shift_type': shift,
+                    'required': needed,
+                    'available': available,
+                    'message': f'The {shift} shift on {DAYS[weekday].title()} needs {needed} employees '
+                               f'but only {available} can work it'
+                })
+    
+    # Busiest 7-day window of required minutes against weekly capacity
+    daily = [
+        sum(low * minutes for (low, _), minutes in zip(demand[day_idx], shift_minutes))
+        for day_idx in range(fixed_days, num_days)
+    ]
+    window = min(7, len(daily))
+    required = max((sum(daily[first:first + window]) for first in range(len(daily) - window + 1)), default=0)
+    if required > weekly_capacity:
+        diagnostics.append({
+            'type': 'insufficient_hours',
+            'required_hours': required / 60,
+            'available_hours': weekly_capacity / 60,
+            'message': f'Covering every shift needs {required / 60:g} hours a week '
+                       f'but employees can work at most {weekly_capacity / 60:g}'
+        })
+    
+    return {
+        'allowed': allowed,
+        'pruned': pruned,
+        'diagnostics': diagnostics
+    }
+
+def build_shift_model(employees, shift_definitions, shifts, num_days=7, start_weekday=0, min_rest_hours=0,
+                      allowed=None, demand=None):
+    """
+    Build the scheduling model with all hard constraints.
+    
+    Each shift is staffed within its `demand` bounds (per-day lists of
+    (min_staff, max_staff), see demand_for_days; default at least one
+    employee). Hour caps apply to every rolling 7-day window, so horizons longer than a
+    week stay within limits across week boundaries, and `min_rest_hours`
+    forbids shift pairs with too little rest between them. Overlap and rest
+    conflicts become AddAtMostOne constraints over conflict_cliques.
+    Weekend, availability and other per-assignment rules are applied by
+    leaving variables out (`allowed`, computed by presolve_assignments).
+    """
+    if allowed is None:
+        allowed = presolve_assignments(
+            employees, shift_definitions, shifts, num_days, start_weekday, demand=demand
+        )['allowed']
+    sm = ShiftModel(employees, shift_definitions, shifts, num_days, start_weekday, allowed)
+    model = sm.model
+    window_days = min(7, num_days)
+    cliques = conflict_cliques(shift_definitions, shifts, num_days, min_rest_hours)
+    
+    # 1. Each shift must be staffed within its demand bounds
+    for day_idx in range(num_days):
+        for s in range(sm.num_shifts):
+            low, high = demand[day_idx][s] if demand else DEFAULT_DEMAND
+            slot = sm.slot_vars(day_idx, s)
+            if low == 1:
+                model.AddBoolOr(slot)
+            elif low > 1:
+                model.Add(cp_model.LinearExpr.Sum(slot) >= low)
+            if high is not None:
+                model.Add(cp_model.LinearExpr.Sum(slot) <= high)
+    
+    for emp_idx, emp in enumerate(employees):
+        # 2. Employee weekly hour limits
+        for first_day in range(num_days - window_days + 1):
+            variables, coefficients = sm.window_terms(emp_idx, first_day, window_days)
+            if variables:
+                model.Add(
+                    cp_model.LinearExpr.WeightedSum(variables, coefficients)
+                    <= (emp.max_hours_per_week or 40) * 60
+                )
+        
+        # 3. No overlapping shifts and minimum rest: one of each conflict clique
+        for clique in cliques:
+            variables = [sm.var(emp_idx, day_idx, s) for day_idx, s in clique]
+            variables = [var for var in variables if var is not None]
+            if len(variables) > 1:
+                model.AddAtMostOne(variables)
+    
+    return sm
+
+class HeuristicSchedule:
+    """
+    Greedy construction plus local search over the same employee x day x shift
+    layout as ShiftModel.
+    
+    Slots are filled from a priority queue, most constrained first (fewest
+    allowed employees), each by the least loaded employee that prefers the
+    shift and breaks no rule. A slot with no such employee goes to the one
+    with the fewest violations. Local search then moves single shifts to
+    other employees while that lowers the weighted objective.
+    """
+    
+    def __init__(self, employees, shift_definitions, shifts, num_days=7, start_weekday=0,
+                 min_rest_hours=0, allowed=None, demand=None):
+        if allowed is None:
+            allowed = presolve_assignments(
+                employees, shift_definitions, shifts, num_days, start_weekday, demand=demand
+            )['allowed']
+        self.employees = employees
+        self.shift_definitions = shift_definitions
+        self.shifts = shifts
+        self.num_days = num_days
+        self.num_shifts = len(shifts)
+        self.allowed = allowed
+        self.demand = demand or [[DEFAULT_DEMAND] * len(shifts)] * num_days
+        self.shift_hours = [
+            calculate_shift_hours(shift_definitions[shift]['start'], shift_definitions[shift]['end'])
+            for shift in shifts
+        ]
+        self.shift_minutes = [int(round(hours * 60)) for hours in self.shift_hours]
+        self.caps = [(emp.max_hours_per_week or 40) * 60 for emp in employees]
+        self.preferred = [
+            shifts.index(emp.preferred_shift_type) if emp.preferred_shift_type in shifts else None
+            for emp in employees
+        ]
+        self.window_days = min(7, num_days)
+        self.fixed_days = 0
+        
+        # Per shift: (day offset, shift bitmask) of overlapping and too-close
+        # instances, and the same restricted to instances that start earlier
+        self.overlaps, self.rests = shift_conflict_masks(shift_definitions, shifts, min_rest_hours)
+        self.overlaps_before, self.rests_before = [
+            [
+                [(offset, mask if offset < 0 else mask & ((1 << s) - 1)) for offset, mask in masks[s] if offset <= 0]
+                for s in range(self.num_shifts)
+            ]
+            for masks in (self.overlaps, self.rests)
+        ]
+        
+        self.day_shifts = [[0] * num_days for _ in employees]
+        self.day_minutes = [[0] * num_days for _ in employees]
+        self.totals = [0] * len(employees)
+        self.slots = {(d, s): [] for d in range(num_days) for s in range(self.num_shifts)}
+    
+    def is_allowed(self, emp_idx, day_idx, shift_idx):
+        return self.allowed[(emp_idx * self.num_days + day_idx) * self.num_shifts + shift_idx]
+    
+    def place(self, emp_idx, day_idx, shift_idx):
+        self.day_shifts[emp_idx][day_idx] |= 1 << shift_idx
+        self.day_minutes[emp_idx][day_idx] += self.shift_minutes[shift_idx]
+        if day_idx >= self.fixed_days:
+            self.totals[emp_idx] += self.shift_minutes[shift_idx]
+        self.slots[day_idx, shift_idx].append(emp_idx)
+    
+    def remove(self, emp_idx, day_idx, shift_idx):
+        self.day_shifts[emp_idx][day_idx] &= ~(1 << shift_idx)
+        self.day_minutes[emp_idx][day_idx] -= self.shift_minutes[shift_idx]
+        if day_idx >= self.fixed_days:
+            self.totals[emp_idx] -= self.shift_minutes[shift_idx]
+        self.slots[day_idx, shift_idx].remove(emp_idx)
+    
+    def fix(self, num_days, assignments):
+        """Place the first `num_days` days from a set of (user_id, day_idx, shift_type)"""
+        self.fixed_days = num_days
+        for emp_idx, emp in enumerate(self.employees):
+            for day_idx in range(num_days):
+                for shift_idx, shift in enumerate(self.shifts):
+                    if (emp.id, day_idx, shift) in assignments:
+                        self.place(emp_idx, day_idx, shift_idx)
+    
+    def hits(self, day_shifts, day_idx, conflicts):
+        """Whether one employee's shifts include any (day offset, mask) conflict"""
+        return any(
+            0 <= day_idx + offset < self.num_days and day_shifts[day_idx + offset] & mask
+            for offset, mask in conflicts
+        )
+    
+    def violations(self, emp_idx, day_idx, shift_idx):
+        """Number of rules (hours, overlap, rest) broken by adding this shift"""
+        day_shifts = self.day_shifts[emp_idx]
+        broken = self.hits(day_shifts, day_idx, self.overlaps[shift_idx]) + \
+            self.hits(day_shifts, day_idx, self.rests[shift_idx])
+        
+        day_minutes = self.day_minutes[emp_idx]
+        limit = self.caps[emp_idx] - self.shift_minutes[shift_idx]
+        last_first = min(day_idx, self.num_days - self.window_days)
+        for first_day in range(max(0, day_idx - self.window_days + 1), last_first + 1):
+            if sum(day_minutes[first_day:first_day + self.window_days]) > limit:
+                broken += 1
+                break
+        return broken
+    
+    def construct(self, sample=20):
+        """
+        Greedily staff every slot on the days that are not fixed up to its
+        minimum demand, trying the `sample` best ranked employees before
+        scanning the whole slot. Slots with the least slack go first.
+        """
+        stride = self.num_days * self.num_shifts
+        candidates = {}
+        queue = []
+        for day_idx in range(self.fixed_days, self.num_days):
+            for shift_idx in range(self.num_shifts):
+                first = day_idx * self.num_shifts + shift_idx
+                slot = [emp_idx for emp_idx, ok in enumerate(self.allowed[first::stride]) if ok]
+                candidates[day_idx, shift_idx] = slot
+                queue.append((len(slot) - self.demand[day_idx][shift_idx][0], day_idx, shift_idx))
+        heapq.heapify(queue)
+        
+        while queue:
+            _, day_idx, shift_idx = heapq.heappop(queue)
+            slot = candidates[day_idx, shift_idx]
+            assigned = self.slots[day_idx, shift_idx]
+            key = lambda e: (self.preferred[e] not in (None, shift_idx), self.totals[e])
+            for _ in range(min(self.demand[day_idx][shift_idx][0], len(slot))):
+                ranked = heapq.nsmallest(sample + len(assigned), slot, key=key)
+                chosen = next((e for e in ranked
+                               if e not in assigned and not self.violations(e, day_idx, shift_idx)), None)
+                if chosen is None:
+                    spare = [e for e in sorted(slot, key=key) if e not in assigned]
+                    chosen = min(spare, key=lambda e: self.violations(e, day_idx, shift_idx))
+                self.place(chosen, day_idx, shift_idx)
+        self.candidates = candidates
+    
+    def improve(self, weights, max_passes=3, sample=20):
+        """
+        Move single shifts to one of the `sample` least loaded employees while
+        that removes a violation or lowers the preference and balance terms.
+        """
+        preference_weight = weights.get('preference', 0)
+        balance_weight = weights.get('balance', 0) / 60
+        for _ in range(max_passes):
+            improved = False
+            for (day_idx, shift_idx), assigned in self.slots.items():
+                if day_idx < self.fixed_days:
+                    continue
+                minutes = self.shift_minutes[shift_idx]
+                for emp_idx in list(assigned):
+                    self.remove(emp_idx, day_idx, shift_idx)
+                    broken = self.violations(emp_idx, day_idx, shift_idx)
+                    mismatch = self.preferred[emp_idx] not in (None, shift_idx)
+                    best, best_delta = emp_idx, 0
+                    ranked = heapq.nsmallest(sample, self.candidates[day_idx, shift_idx], key=self.totals.__getitem__)
+                    for other in ranked:
+                        if other == emp_idx or other in assigned or self.violations(other, day_idx, shift_idx):
+                            continue
+                        gap = self.totals[emp_idx] + minutes - self.totals[other]
+                        delta = (
+                            preference_weight * ((self.preferred[other] not in (None, shift_idx)) - mismatch)
+                            + balance_weight * (abs(gap - 2 * minutes) - abs(gap))
+                        )
+                        if broken or delta < best_delta:
+                            best, best_delta = other, delta
+                            if broken:
+                                break
+                    self.place(best, day_idx, shift_idx)
+                    improved |= best != emp_idx
+            if not improved:
+                break
+    
+    def assignments(self):
+        """Yield (emp_idx, day_idx, shift_idx) for every assigned shift"""
+        for (day_idx, shift_idx), assigned in self.slots.items():
+            for emp_idx in assigned:
+                yield emp_idx, day_idx, shift_idx
+    
+    def report(self, weights):
+        """Objective terms (as in ShiftModel.objective_report) and rule violations"""
+        free_days = range(self.fixed_days, self.num_days)
+        violations = {'uncovered': 0, 'hours': 0, 'overlap': 0, 'rest': 0}
+        preference = overstaffing = 0
+        for (day_idx, shift_idx), assigned in self.slots.items():
+            if day_idx < self.fixed_days:
+                continue
+            needed = self.demand[day_idx][shift_idx][0]
+            violations['uncovered'] += max(needed - len(assigned), 0)
+            overstaffing += max(len(assigned) - needed, 0)
+            preference += sum(self.preferred[e] not in (None, shift_idx) for e in assigned)
+        
+        working = []
+        stride = self.num_days * self.num_shifts
+        for emp_idx, day_shifts in enumerate(self.day_shifts):
+            first = emp_idx * stride
+            if any(self.allowed[first + self.fixed_days * self.num_shifts:first + stride]):
+                working.append(self.totals[emp_idx])
+            if not any(day_shifts):
+                continue
+            # Count each conflicting pair once, at its later shift
+            for day_idx in free_days:
+                for s in range(self.num_shifts):
+                    if day_shifts[day_idx] >> s & 1:
+                        violations['overlap'] += self.hits(day_shifts, day_idx, self.overlaps_before[s])
+                        violations['rest'] += self.hits(day_shifts, day_idx, self.rests_before[s])
+            day_minutes = self.day_minutes[emp_idx]
+            violations['hours'] += any(
+                sum(day_minutes[first_day:first_day + self.window_days]) > self.caps[emp_idx]
+                for first_day in range(self.num_days - self.window_days + 1)
+            )
+        
+        values = {
+            'preference': preference,
+            'balance': (max(working) - min(working)) / 60 if len(working) > 1 else 0,
+            'overstaffing': overstaffing
+        }
+        terms = {
+            name: {'value': value, 'weight': weights.get(name, 0), 'weighted': value * weights.get(name, 0)}
+            for name, value in values.items()
+        }
+        return {
+            # Same scale as the CP-SAT objective_value
+            'objective_value': round(sum(term['weighted'] for term in terms.values()) * OBJECTIVE_SCALE),
+            'objective_terms': terms,
+            'violations': violations
+        }
+
+def schedule_entry(emp, shift_date, shift, shift_definitions, hours):
+    """Build one generated schedule dict"""
+    return {
+        'user_id': emp.id,
+        'user_name': emp.name,
+        'date': shift_date,
+        'shift_type': shift,
+        'start_time': shift_definitions[shift]['start'],
+        'end_time': shift_definitions[shift]['end'],
+        'hours': hours
+    }
+
+def round_robin_schedules(employees, week_start_date, shift_definitions, shifts, num_days=7):
+    """Simple round-robin assignment that ignores hour limits and availability"""
+    schedules = []
+    for day_idx in range(num_days):
+        shift_date = week_start_date + timedelta(days=day_idx)
+        for shift_idx, shift in enumerate(shifts):
+            emp = employees[(day_idx + shift_idx) % len(employees)]
+            hours = calculate_shift_hours(shift_definitions[shift]['start'], shift_definitions[shift]['end'])
+            schedules.append(schedule_entry(emp, shift_date, shift, shift_definitions, hours))
+    return schedules
+
+def generate_shifts(employees, week_start_date, constraints=None, solve_info=None,
+                    on_solution=None, should_stop=None, hints=None, demand=None, templates=None,
+                    executor=None):
+    """
+    Generate optimal shift schedule using OR-Tools
+    
+    If a `solve_info` dict is passed it is filled with the solver status,
+    objective value/bound, wall time and the parameters that were used.
+    `on_solution` is called with every intermediate solution, and the search
+    stops early once `should_stop()` returns True. `hints` is a set of
+    (user_id, day_idx, shift_type) assignments used to warm-start the search.
+    
+    `constraints['horizon_weeks']` schedules several weeks at once; long
+    horizons (or `constraints['decompose']`) are solved one week at a time.
+    
+    Impossible assignments are pruned before the model is built. When that
+    leaves some shift uncoverable, nothing is solved: an empty list is
+    returned and `solve_info['diagnostics']` explains why.
+    
+    The solver minimizes a weighted sum of non-preferred shifts, the hour
+    spread between employees and shifts above coverage; weights come from
+    `constraints['objective_weights']` and the per-term values are reported
+    in `solve_info['objective_terms']`. `constraints['mode'] = 'heuristic'`
+    skips CP-SAT and returns the greedy schedule (see HeuristicSchedule).
+    
+    `demand` is a staffing demand table (see load_staffing_demand) giving
+    each shift its minimum and maximum headcount, and `templates` are the
+    shift templates to schedule (see load_shift_templates).
+    
+    With `constraints['partition']`, employees in different departments are
+    solved as separate partitions (see partition_employees), on `executor`
+    when one is given, and merged into one schedule;
+    solve_info['partitions'] has each partition's result.
+    """
+    if solve_info is None:
+        solve_info = {}
+    
+    if not employees:
+        return []
+    
+    constraints = constraints or {}
+    
+    partitions = partition_employees(employees, constraints)
+    if len(partitions) > 1:
+        return solve_partitions(
+            partitions, week_start_date, constraints, solve_info, hints, demand, templates, executor
+        )
+    
+    shift_definitions, shifts = get_shift_definitions(constraints, templates)
+    horizon_weeks = get_horizon_weeks(constraints)
+    decompose = constraints.get('decompose', horizon_weeks > app.config['SCHEDULE_DECOMPOSE_WEEKS'])
+    
+    # Presolve the whole horizon: demand can differ from week to week
+    num_days = 7 * horizon_weeks
+    presolve = presolve_assignments(
+        employees, shift_definitions, shifts, num_days, week_start_date.weekday(),
+        hard_preferences=bool(constraints.get('hard_preferences')),
+        demand=demand_for_days(demand, week_start_date, num_days, shifts)
+    )
+    if presolve['diagnostics']:
+        solve_info.update({
+            'status': 'INFEASIBLE',
+            'fallback': False,
+            'pruned': presolve['pruned'],
+            'diagnostics': presolve['diagnostics']
+        })
+        return []
+    
+    if horizon_weeks > 1 and decompose:
+        return solve_horizon_by_week(
+            employees, week_start_date, horizon_weeks, shift_definitions, shifts,
+            constraints, solve_info, on_solution, should_stop, hints, demand
+        )
+    
+    return solve_shift_block(
+        employees, week_start_date, num_days, shift_definitions, shifts,
+        constraints, solve_info, on_solution, should_stop, hints,
+        presolve=presolve, demand=demand
+    )
+
+def solve_shift_block(employees, start_date, num_days, shift_definitions, shifts, constraints,
+                      solve_info, on_solution=None, should_stop=None, hints=None, carry_in=None,
+                      presolve=None, demand=None):
+    """
+    Solve `num_days` days starting at `start_date` in a single CP-SAT model.
+    
+    `carry_in` = {'days': k, 'assignments': {(user_id, day_idx, shift_type)}}
+    prepends k already-scheduled days so hour windows and rest rules see them.
+    `presolve` may pass in a presolve_assignments result for exactly this block.
+    `demand` is the staffing demand table passed to generate_shifts.
+    
+    A HeuristicSchedule is built first: it is the whole answer in heuristic
+    mode, the solution hint when there is no warm start, and the fallback
+    when CP-SAT finds nothing. Its report is kept in solve_info['heuristic'];
+    if it fails outside heuristic mode, CP-SAT solves without it.
+    """
+    fixed_days = carry_in['days'] if carry_in else 0
+    model_start = start_date - timedelta(days=fixed_days)
+    min_rest_hours = constraints.get('min_rest_hours', 0)
+    weights = get_objective_weights(constraints)
+    block_demand = demand_for_days(demand, model_start, fixed_days + num_days, shifts)
+    
+    build_start = time.perf_counter()
+    if presolve is None:
+        presolve = presolve_assignments(
+            employees, shift_definitions, shifts, fixed_days + num_days, model_start.weekday(),
+            fixed_days=fixed_days, hard_preferences=bool(constraints.get('hard_preferences')),
+            demand=block_demand
+        )
+    solve_info['pruned'] = presolve['pruned']
+    
+    def build_heuristic():
+        heuristic = HeuristicSchedule(
+            employees, shift_definitions, shifts, fixed_days + num_days,
+            start_weekday=model_start.weekday(), min_rest_hours=min_rest_hours, allowed=presolve['allowed'],
+            demand=block_demand
+        )
+        if carry_in:
+            heuristic.fix(fixed_days, carry_in['assignments'])
+        heuristic.construct()
+        heuristic.improve(weights)
+        solve_info['heuristic'] = dict(heuristic.report(weights), time=time.perf_counter() - build_start)
+        return heuristic
+    
+    def schedule_from(assignments, shift_hours):
+        return [
+            schedule_entry(
+                employees[emp_idx], model_start + timedelta(days=day_idx),
+                shifts[shift_idx], shift_definitions, shift_hours[shift_idx]
+            )
+            for emp_idx, day_idx, shift_idx in assignments
+            if day_idx >= fixed_days
+        ]
+    
+    if get_solver_mode(constraints) == 'heuristic':
+        heuristic = build_heuristic()
+        solve_info.update({
+            'status': 'HEURISTIC',
+            'objective_value': solve_info['heuristic']['objective_value'],
+            'objective_terms': solve_info['heuristic']['objective_terms'],
+            'wall_time': solve_info['heuristic']['time'],
+            'fallback': False
+        })
+        return schedule_from(heuristic.assignments(), heuristic.shift_hours)
+    
+    # Only a hint and a fallback for CP-SAT, so a failure here must not stop the solve
+    try:
+        heuristic = build_heuristic()
+    except Exception as e:
+        print(f"Heuristic error: {e}")
+        solve_info['heuristic_error'] = str(e)
+        heuristic = None
+    
+    try:
+        sm = build_shift_model(
+            employees, shift_definitions, shifts, fixed_days + num_days,
+            start_weekday=model_start.weekday(),
+            min_rest_hours=min_rest_hours,
+            allowed=presolve['allowed'],
+            demand=block_demand
+        )
+        solve_info['variables'] = len(sm.x) - sm.eliminated
+        solve_info['eliminated_variables'] = sm.eliminated
+        if carry_in:
+            sm.fix_days(fixed_days, carry_in['assignments'])
+        if hints is not None:
+            minimal_disruption = bool(constraints.get('minimal_disruption'))
+            shifted = {(user_id, day_idx + fixed_days, shift) for user_id, day_idx, shift in hints}
+            solve_info['hinted_shifts'] = sm.add_hints(shifted, minimal_disruption)
+            solve_info['minimal_disruption'] = minimal_disruption
+        elif heuristic is not None and constraints.get('heuristic_hint', True):
+            sm.add_hints({
+                (employees[emp_idx].id, day_idx, shifts[shift_idx])
+                for emp_idx, day_idx, shift_idx in heuristic.assignments()
+            })
+        sm.add_preference_term()
+        sm.add_overstaffing_term(sum(low for day in block_demand[fixed_days:] for low, _ in day))
+        if weights['balance']:
+            sm.add_balance_term()
+        sm.set_objective(weights)
+        solve_info['build_time'] = time.perf_counter() - build_start
+        
+        def extract_solution(value):
+            return [
+                {
+                    'user_id': employees[emp_idx].id,
+                    'date': (model_start + timedelta(days=day_idx)).isoformat(),
+                    'shift_type': shifts[shift_idx]
+                }
+                for emp_idx, day_idx, shift_idx in sm.assignments(value)
+                if day_idx >= fixed_days
+            ]
+        
+        # Solve
+        parameters = get_solver_parameters(constraints)
+        solver = create_solver(parameters)
+        if on_solution or should_stop:
+            callback = ScheduleSolutionCallback(extract_solution, on_solution, should_stop)
+            with stop_solver_when(solver, should_stop):
+                status = solver.Solve(sm.model, callback)
+        else:
+            status = solver.Solve(sm.model)
+        
+        solve_info.update({
+            'status': solver.StatusName(status),
+            'objective_value': solver.ObjectiveValue(),
+            'best_objective_bound': solver.BestObjectiveBound(),
+            'wall_time': solver.WallTime(),
+            'parameters': parameters,
+            'fallback': status not in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        })
+        
+        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            solve_info['objective_terms'] = sm.objective_report(solver.Value, weights)
+            return schedule_from(sm.assignments(solver.BooleanValue), sm.shift_hours)
+    
+    except Exception as e:
+        print(f"OR-Tools error: {e}")
+        solve_info.update({'status': 'ERROR', 'error': str(e), 'fallback': True})
+    
+    if heuristic is None:
+        return []
+    return schedule_from(heuristic.assignments(), heuristic.shift_hours)
+
+def sum_solve_reports(reports):
+    """
+    Add up the solve_info of independently solved blocks (weeks or
+    partitions): objective, bound, timings, model size, pruning and the
+    heuristic report
+    """
+    reports = list(reports)
+    total = {
+        'objective_value': sum(report.get('objective_value', 0) for report in reports),
+        'best_objective_bound': sum(report.get('best_objective_bound', 0) for report in reports),
+        'wall_time': sum(report.get('wall_time', 0) for report in reports),
+        'build_time': sum(report.get('build_time', 0) for report in reports),
+        'variables': sum(report.get('variables', 0) for report in reports),
+        'eliminated_variables': sum(report.get('eliminated_variables', 0) for report in reports),
+        'pruned': {
+            reason: sum(report.get('pruned', {}).get(reason, 0) for report in reports)
+            for reason in ('weekend', 'availability', 'preference', 'hours')
+        },
+        'fallback': any(report.get('fallback') for report in reports),
+        'objective_terms': sum_objective_terms(report.get('objective_terms', {}) for report in reports)
+    }
+    # Blocks whose heuristic failed (see solve_shift_block) have no report to add up
+    if all('heuristic' in report for report in reports):
+        total['heuristic'] = {
+            'objective_value': sum(report['heuristic']['objective_value'] for report in reports),
+            'objective_terms': sum_objective_terms(report['heuristic']['objective_terms'] for report in reports),
+            'violations': {
+                rule: sum(report['heuristic']['violations'][rule] for report in reports)
+                for rule in ('uncovered', 'hours', 'overlap', 'rest')
+            },
+            'time': sum(report['heuristic']['time'] for report in reports)
+        }
+    return total
+
+def sum_objective_terms(reports):
+    """Add up per-block objective_report dicts term by term"""
+    total = {}
+    for report in reports:
+        for name, term in report.items():
+            summed = total.setdefault(name, {'value': 0, 'weight': term['weight'], 'weighted': 0})
+            summed['value'] += term['value']
+            summed['weighted'] += term['weighted']
+    return total
+
+def solve_horizon_by_week(employees, week_start_date, horizon_weeks, shift_definitions, shifts,
+                          constraints, solve_info, on_solution=None, should_stop=None, hints=None,
+                          demand=None):
+    """
+    Solve a multi-week horizon one week at a time.
+    
+    Each week carries in the previous six scheduled days, so rolling hour
+    limits and rest rules still hold across week boundaries. The time limit
+    is split evenly between the weeks.
+    """
+    parameters = get_solver_parameters(constraints)
+    week_constraints = dict(constraints, time_limit_seconds=parameters['time_limit_seconds'] / horizon_weeks)
+    
+    schedules = []
+    weeks = []
+    carry_in = None
+    for week in range(horizon_weeks):
+        if should_stop and should_stop():
+            break
+        
+        start = week_start_date + timedelta(weeks=week)
+        week_hints = None
+        if hints is not None:
+            week_hints = {(u, d - 7 * week, s) for u, d, s in hints if 7 * week <= d < 7 * (week + 1)}
+        
+        week_info = {}
+        week_schedules = solve_shift_block(
+            employees, start, 7, shift_definitions, shifts, week_constraints,
+            week_info, on_solution, should_stop, week_hints, carry_in, demand=demand
+        )
+        schedules.extend(week_schedules)
+        weeks.append(dict(week_info, week_start=start.isoformat()))
+        
+        # The next week sees this week's last six days (unless it fell back)
+        carry_start = start + timedelta(days=1)
+        carry_in = None if week_info.get('fallback') else {
+            'days': 6,
+            'assignments': {
+                (entry['user_id'], (entry['date'] - carry_start).days, entry['shift_type'])
+                for entry in week_schedules if entry['date'] >= carry_start
+            }
+        }
+    
+    # Report the weakest per-week status
+    statuses = [week['status'] for week in weeks] or ['UNKNOWN']
+    solve_info.update(sum_solve_reports(weeks), **{
+        'status': next((status for status in statuses if status != 'OPTIMAL'), 'OPTIMAL'),
+        'parameters': parameters,
+        'decomposed': True,
+        'weeks': weeks
+    })
+    return schedules
+
+def partition_employees(employees, constraints=None):
+    """
+    Group employees by department into {name: employees} when
+    constraints['partition'] is true. Employees without a department form
+    the 'unassigned' partition. Off by default: the staffing demand table
+    has no department, so every partition must cover all of it alone.
+    """
+    if not (constraints or {}).get('partition', False):
+        return {'all': list(employees)}
+    
+    partitions = {}
+    for emp in employees:
+        partitions.setdefault(getattr(emp, 'department', None) or 'unassigned', []).append(emp)
+    return partitions
+
+def solve_partition(employees, week_start_date, constraints, hints=None, demand=None, templates=None):
+    """Process-pool entry point: solve one partition and time it"""
+    solve_info = {}
+    start = time.perf_counter()
+    schedules = generate_shifts(
+        employees, week_start_date, dict(constraints, partition=False), solve_info,
+        hints=hints, demand=demand, templates=templates
+    )
+    solve_info.update(solve_time=time.perf_counter() - start, employees=len(employees))
+    return schedules, solve_info
+
+def partition_hints(hints, employees):
+    """The warm-start hints that belong to one partition's employees"""
+    if hints is None:
+        return None
+    user_ids = {emp.id for emp in employees}
+    return {hint for hint in hints if hint[0] in user_ids}
+
+# solve_info fields repeated per partition in a merged result
+PARTITION_REPORT_KEYS = (
+    'status', 'objective_value', 'best_objective_bound', 'wall_time', 'build_time', 'variables',
+    'eliminated_variables', 'pruned', 'parameters', 'fallback', 'heuristic'
+)
+
+def merge_partition_results(results):
+    """Combine {partition: (schedules, solve_info)} into one schedule list and solve_info"""
+    schedules = []
+    diagnostics = []
+    for name, (partition_schedules, info) in results.items():
+        schedules.extend(partition_schedules)
+        diagnostics.extend(
+            dict(diagnostic, partition=name, message=f"{name}: {diagnostic['message']}")
+            for diagnostic in info.get('diagnostics', [])
+        )
+    
+    infos = [info for _, info in results.values()]
+    statuses = [info.get('status', 'UNKNOWN') for info in infos]
+    solve_info = dict(sum_solve_reports(infos), **{
+        'status': next((status for status in statuses if status != 'OPTIMAL'), 'OPTIMAL'),
+        'parameters': next((info['parameters'] for info in infos if 'parameters' in info), None),
+        'partitioned': True,
+        'partitions': {
+            name: dict(
+                {key: info[key] for key in PARTITION_REPORT_KEYS if key in info},
+                employees=info.get('employees'),
+                shifts=len(partition_schedules),
+                solve_time=info.get('solve_time')
+            )
+            for name, (partition_schedules, info) in results.items()
+        }
+    })
+    if diagnostics:
+        solve_info['diagnostics'] = diagnostics
+    return schedules, solve_info
+
+def solve_partitions(partitions, week_start_date, constraints, solve_info, hints=None, demand=None,
+                     templates=None, executor=None):
+    """
+    Solve each partition independently, in parallel on `executor` (a
+    process pool) when given, and merge the results
+    """
+    start = time.perf_counter()
+    if executor is None:
+        results = {
+            name: solve_partition(members, week_start_date, constraints, partition_hints(hints, members),
+                                  demand, templates)
+            for name, members in partitions.items()
+        }
+    else:
+        # Resolve solver parameters here; pool processes don't share app.config
+        constraints = dict(constraints)
+        constraints.update(get_solver_parameters(constraints))
+        futures = {
+            name: executor.submit(
+                solve_partition, snapshot_employees(members), week_start_date, constraints,
+                partition_hints(hints, members), demand, templates
+            )
+            for name, members in partitions.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    
+    schedules, merged = merge_partition_results(results)
+    solve_info.update(merged, wall_time=time.perf_counter() - start)
+    return [] if merged.get('diagnostics') else schedules
+
+# Objective weight per position a repair leaves unfilled
+UNFILLED_WEIGHT = 1000
+
+def repair_schedule(employees, week_start_date, existing, constraints=None, solve_info=None, demand=None,
+                    templates=None):
+    """
+    Fill the open slots of a published week without moving anyone else.
+    
+    `existing` maps schedule ids to (user_id, day_idx, shift_type,
+    start_time, end_time), the times as stored so that edited shifts are
+    checked as worked. An assignment is released when its employee or shift
+    type is gone, when presolve no longer allows it, or when it breaks an
+    hour cap, overlap or rest rule together with the assignments kept
+    before it; everything else stays fixed. Each slot short of its minimum
+    demand then gets up to SCHEDULE_REPAIR_CANDIDATES employees who can take
+    it without breaking a rule, and a small CP-SAT model picks among them:
+    fewest unfilled positions first, then non-preferred shifts and hours
+    given to already busy employees.
+    
+    Returns (new schedule entries, released schedule ids); `solve_info` gets
+    the solver status, open and unfilled position counts.
+    """
+    if solve_info is None:
+        solve_info = {}
+    constraints = constraints or {}
+    shift_definitions, shifts = get_shift_definitions(constraints, templates)
+    weights = get_objective_weights(constraints)
+    week_demand = demand_for_days(demand, week_start_date, 7, shifts)
+    rest = int(constraints.get('min_rest_hours', 0) * 60)
+    build_start = time.perf_counter()
+    
+    allowed = presolve_assignments(
+        employees, shift_definitions, shifts, 7, week_start_date.weekday(),
+        hard_preferences=bool(constraints.get('hard_preferences')), demand=week_demand
+    )['allowed']
+    state = HeuristicSchedule(
+        employees, shift_definitions, shifts, 7, start_weekday=week_start_date.weekday(),
+        min_rest_hours=constraints.get('min_rest_hours', 0), allowed=allowed, demand=week_demand
+    )
+    
+    # Kept shifts per employee as (start, end) minutes from the week start
+    worked = [[] for _ in employees]
+    
+    def interval(day_idx, start_time, end_time):
+        start, end = shift_minutes_of_day({'start': start_time, 'end': end_time})
+        return day_idx * 24 * 60 + start, day_idx * 24 * 60 + end
+    
+    def fits(emp_idx, start, end):
+        """Whether a shift keeps an employee within their cap, overlap and rest rules"""
+        if state.totals[emp_idx] + end - start > state.caps[emp_idx]:
+            return False
+        return all(start >= other_end + rest or other_start >= end + rest for other_start, other_end in worked[emp_idx])
+    
+    # Keep what still fits, in time order
+    positions = {emp.id: emp_idx for emp_idx, emp in enumerate(employees)}
+    released = []
+    for schedule_id, (user_id, day_idx, shift, start_time, end_time) in sorted(
+            existing.items(), key=lambda item: (item[1][1], item[1][3])):
+        emp_idx = positions.get(user_id)
+        shift_idx = shifts.index(shift) if shift in shifts else None
+        start, end = interval(day_idx, start_time, end_time)
+        if (emp_idx is None or shift_idx is None or not state.is_allowed(emp_idx, day_idx, shift_idx)
+                or not fits(emp_idx, start, end)):
+            released.append(schedule_id)
+        else:
+            worked[emp_idx].append((start, end))
+            state.totals[emp_idx] += end - start
+            state.slots[day_idx, shift_idx].append(emp_idx)
+    
+    # Candidates per open slot, preferred and least loaded first
+    limit = app.config['SCHEDULE_REPAIR_CANDIDATES']
+    stride = 7 * state.num_shifts
+    model = cp_model.CpModel()
+    slots = {}
+    x = {}
+    for day_idx in range(7):
+        for shift_idx in range(state.num_shifts):
+            needed = week_demand[day_idx][shift_idx][0] - len(state.slots[day_idx, shift_idx])
+            if needed <= 0:
+                continue
+            first = day_idx * state.num_shifts + shift_idx
+            key = lambda e: (state.preferred[e] not in (None, shift_idx), state.totals[e])
+            allowed_here = [emp_idx for emp_idx, ok in enumerate(allowed[first::stride]) if ok]
+            candidates = []
+            definition = shift_definitions[shifts[shift_idx]]
+            start, end = interval(day_idx, definition['start'], definition['end'])
+            for emp_idx in sorted(allowed_here, key=key):
+                if len(candidates) == limit:
+                    break
+                if emp_idx not in state.slots[day_idx, shift_idx] and fits(emp_idx, start, end):
+                    candidates.append(emp_idx)
+            for emp_idx in candidates:
+                x[emp_idx, day_idx, shift_idx] = model.NewBoolVar('')
+            slots[day_idx, shift_idx] = (needed, candidates)
+    
+    unfilled = []
+    for (day_idx, shift_idx), (needed, candidates) in slots.items():
+        short = model.NewIntVar(0, needed, '')
+        model.Add(cp_model.LinearExpr.Sum([x[e, day_idx, shift_idx] for e in candidates]) + short == needed)
+        unfilled.append(short)
+    
+    # Hour caps and conflicts only matter between the new shifts of one employee
+    by_employee = {}
+    for emp_idx, day_idx, shift_idx in x:
+        by_employee.setdefault(emp_idx, []).append((day_idx, shift_idx))
+    cliques = conflict_cliques(shift_definitions, shifts, 7, constraints.get('min_rest_hours', 0))
+    for emp_idx, picks in by_employee.items():
+        if len(picks) < 2:
+            continue
+        variables = [x[emp_idx, day_idx, shift_idx] for day_idx, shift_idx in picks]
+        minutes = [state.shift_minutes[shift_idx] for _, shift_idx in picks]
+        model.Add(cp_model.LinearExpr.WeightedSum(variables, minutes) <= state.caps[emp_idx] - state.totals[emp_idx])
+        picked = set(picks)
+        for clique in cliques:
+            variables = [x[emp_idx, day_idx, shift_idx] for day_idx, shift_idx in clique if (day_idx, shift_idx) in picked]
+            if len(variables) > 1:
+                model.AddAtMostOne(variables)
+    
+    mismatched = [var for (emp_idx, _, shift_idx), var in x.items() if state.preferred[emp_idx] not in (None, shift_idx)]
+    load = [(var, state.totals[emp_idx] // 60) for (emp_idx, _, _), var in x.items()]
+    terms = {
+        'unfilled': (cp_model.LinearExpr.Sum(unfilled), UNFILLED_WEIGHT),
+        'preference': (cp_model.LinearExpr.Sum(mismatched), weights['preference']),
+        # Hours already worked by whoever picks up an open shift
+        'balance': (cp_model.LinearExpr.WeightedSum([var for var, _ in load], [hours for _, hours in load]),
+                    weights['balance'])
+    }
+    model.Minimize(sum(int(weight * OBJECTIVE_SCALE) * expr for expr, weight in terms.values()))
+    solve_info['build_time'] = time.perf_counter() - build_start
+    
+    parameters = get_solver_parameters(dict(
+        constraints, time_limit_seconds=min(
+            float(constraints.get('time_limit_seconds', app.config['SCHEDULE_REPAIR_TIME_LIMIT_SECONDS'])),
+            app.config['SCHEDULE_REPAIR_TIME_LIMIT_SECONDS']
+        )
+    ))
+    solver = create_solver(parameters)
+    status = solver.Solve(model)
+    solve_info.update({
+        'status': solver.StatusName(status),
+        'variables': len(x),
+        'parameters': parameters,
+        'wall_time': solver.WallTime(),
+        'kept': len(existing) - len(released),
+        'released': len(released),
+        'open_positions': sum(needed for needed, _ in slots.values())
+    })
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        solve_info['unfilled_positions'] = solve_info['open_positions']
+        return [], released
+    
+    solve_info.update({
+        'objective_value': solver.ObjectiveValue(),
+        'objective_terms': {
+            name: {'value': solver.Value(expr), 'weight': weight, 'weighted': solver.Value(expr) * weight}
+            for name, (expr, weight) in terms.items()
+        },
+        'unfilled_positions': sum(solver.Value(short) for short in unfilled)
+    })
+    return [
+        schedule_entry(
+            employees[emp_idx], week_start_date + timedelta(days=day_idx), shifts[shift_idx],
+            shift_definitions, state.shift_hours[shift_idx]
+        )
+        for (emp_idx, day_idx, shift_idx), var in x.items()
+        if solver.BooleanValue(var)
+    ], released
+
+def load_schedule_hints(week_start_date, constraints=None):
+    """
+    Load warm-start hints for generate_shifts from stored Schedule rows.
+    
+    `constraints['warm_start']` selects the source: 'previous_week' (or True)
+    reuses last week's roster, 'current_week' keeps the week being
+    re-generated as close as possible to what is already published.
+    """
+    source = (constraints or {}).get('warm_start')
+    if not source:
+        return None
+    
+    # For multi-week horizons the "week" is the whole horizon
+    horizon_weeks = get_horizon_weeks(constraints)
+    if source == 'current_week':
+        hint_start = week_start_date
+    elif source is True or source == 'previous_week':
+        hint_start = week_start_date - timedelta(weeks=horizon_weeks)
+    else:
+        raise ValueError(f'Unknown warm_start source: {source}')
+    
+    rows = db.session.query(Schedule.user_id, Schedule.date, Schedule.shift_type).filter(
+        Schedule.date >= hint_start,
+        Schedule.date < hint_start + timedelta(weeks=horizon_weeks)
+    ).all()
+    return {(user_id, (shift_date - hint_start).days, shift_type) for user_id, shift_date, shift_type in rows}
+
+# Schedule result cache
+def schedule_fingerprint(employees, week_start_date, constraints=None, hints=None, demand=None, templates=None):
+    """Stable hash of every input generate_shifts reads"""
+    constraints = constraints or {}
+    shift_definitions, _ = get_shift_definitions(constraints, templates)
+    
+    payload = {
+        'week_start': week_start_date.isoformat(),
+        'shift_definitions': shift_definitions,
+        'constraints': constraints,
+        'employees': sorted(
+            [emp.id, emp.max_hours_per_week, emp.can_work_weekends, emp.availability, emp.availability_mask,
+             emp.preferred_shift_type, emp.department]
+            for emp in employees
+        ),
+        'hints': sorted(hints) if hints is not None else None,
+        'demand': demand or {}
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+class ScheduleResultCache:
+    """Bounded LRU cache of generated schedules keyed by input fingerprint"""
+    
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return {'schedules': [dict(s) for s in entry['schedules']], 'solver': dict(entry['solver'])}
+    
+    def put(self, key, schedules, solve_info, user_ids):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = {
+                'schedules': [dict(s) for s in schedules],
+                'solver': dict(solve_info),
+                'user_ids': frozenset(user_ids)
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for key in [k for k, entry in self.entries.items() if user_id in entry['user_ids']]:
+                del self.entries[key]
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+schedule_cache = ScheduleResultCache(app.config['SCHEDULE_CACHE_SIZE'])
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_schedules(mapper, connection, target):
+    """Drop cached results that were computed from a changed employee"""
+    schedule_cache.invalidate_user(target.id)
+
+def cache_schedule_result(cache_key, user_ids, generated_schedules, solve_info):
+    """Remember a solved week unless it came from the fallback path"""
+    if cache_key and generated_schedules and not solve_info.get('fallback'):
+        schedule_cache.put(cache_key, generated_schedules, solve_info, user_ids)
+
+# Background schedule generation
+EmployeeSnapshot = namedtuple('EmployeeSnapshot', [
+    'id', 'name', 'max_hours_per_week', 'can_work_weekends', 'preferred_shift_type', 'availability',
+    'availability_mask', 'department'
+], defaults=(None,))
+
+def snapshot_employees(employees):
+    """Copy the employee fields the scheduler reads into picklable tuples"""
+    return [
+        EmployeeSnapshot(
+            id=emp.id,
+            name=emp.name,
+            max_hours_per_week=emp.max_hours_per_week,
+            can_work_weekends=emp.can_work_weekends,
+            preferred_shift_type=emp.preferred_shift_type,
+            availability=emp.availability,
+            availability_mask=emp.availability_mask,
+            department=emp.department
+        )
+        for emp in employees
+    ]
+
+def run_schedule_job(employees, week_start_date, constraints, progress, cancel_event, hints=None, demand=None,
+                     templates=None, partition=None):
+    """Process-pool entry point: solve one week (or one partition of it) and publish progress"""
+    progress['status'] = 'running'
+    
+    def on_solution(solution):
+        progress['latest'] = dict(solution, partition=partition) if partition else solution
+    
+    solve_info = {}
+    start = time.perf_counter()
+    schedules = generate_shifts(
+        employees, week_start_date, constraints, solve_info,
+        on_solution=on_solution, should_stop=cancel_event.is_set, hints=hints, demand=demand,
+        templates=templates
+    )
+    solve_info.update(solve_time=time.perf_counter() - start, employees=len(employees))
+    return schedules, solve_info
+
+_job_lock = threading.Lock()
+_job_executor = None
+_job_manager = None
+schedule_jobs = {}
+
+def get_job_executor():
+    """Lazily start the solver process pool and its shared-state manager"""
+    global _job_executor, _job_manager
+    with _job_lock:
+        if _job_executor is None:
+            context = multiprocessing.get_context('spawn')
+            _job_manager = context.Manager()
+            _job_executor = ProcessPoolExecutor(
+                max_workers=app.config['SCHEDULE_JOB_WORKERS'],
+                mp_context=context
+            )
+        return _job_executor, _job_manager
+
+def prune_schedule_jobs():
+    """Forget the oldest finished jobs beyond SCHEDULE_JOB_HISTORY"""
+    finished = [job for job in schedule_jobs.values() if job['future'].done()]
+    excess = len(finished) - app.config['SCHEDULE_JOB_HISTORY']
+    for job in sorted(finished, key=lambda job: job['created_at'])[:max(excess, 0)]:
+        schedule_jobs.pop(job['id'], None)
+
+def submit_schedule_job(employees, week_start, week_end, constraints=None, cache_key=None, hints=None,
+                        demand=None, templates=None):
+    """Queue a schedule generation job and return its id"""
+    executor, manager = get_job_executor()
+    
+    # Resolve solver parameters here; pool processes don't share app.config
+    constraints = dict(constraints or {})
+    constraints.update(get_solver_parameters(constraints))
+    
+    job_id = uuid.uuid4().hex
+    progress = manager.dict({'status': 'queued'})
+    cancel_event = manager.Event()
+    
+    # One pool task per partition; `future` resolves once all of them finish
+    partitions = partition_employees(employees, constraints)
+    partition_futures = {
+        name: executor.submit(
+            run_schedule_job, snapshot_employees(members), week_start, dict(constraints, partition=False),
+            progress, cancel_event, partition_hints(hints, members), demand, templates,
+            name if len(partitions) > 1 else None
+        )
+        for name, members in partitions.items()
+    }
+    future = Future()
+    pending = [len(partition_futures)]
+    
+    def partition_done(_):
+        with _job_lock:
+            pending[0] -= 1
+            finished = pending[0] == 0
+        if finished and future.set_running_or_notify_cancel():
+            future.set_result(None)
+    
+    job = {
+        'id': job_id,
+        'cache_key': cache_key,
+        'user_ids': [emp.id for emp in employees],
+        'week_start': week_start,
+        'week_end': week_end,
+        'created_at': time.time(),
+        'finished_at': None,
+        'future': future,
+        'partition_futures': partition_futures,
+        'progress': progress,
+        'cancel_event': cancel_event,
+        'status': 'queued',
+        'result': None,
+        'error': None
+    }
+    with _job_lock:
+        prune_schedule_jobs()
+        schedule_jobs[job_id] = job
+    
+    future.add_done_callback(lambda f: finish_schedule_job(job))
+    for partition_future in partition_futures.values():
+        partition_future.add_done_callback(partition_done)
+    return job_id
+
+def finish_schedule_job(job):
+    """Persist a finished job's schedules unless it was cancelled"""
+    future = job['future']
+    try:
+        if future.cancelled() or job['cancel_event'].is_set():
+            job['status'] = 'cancelled'
+            return
+        
+        results = {name: partition.result() for name, partition in job['partition_futures'].items()}
+        if len(results) == 1:
+            generated_schedules, solve_info = next(iter(results.values()))
+        else:
+            generated_schedules, solve_info = merge_partition_results(results)
+        if solve_info.get('diagnostics'):
+            # Presolve proved the week can't be covered; keep the stored rows
+            job['result'] = {'shifts': 0, 'solver': solve_info}
+            job['error'] = 'Schedule is infeasible'
+            job['status'] = 'failed'
+            return
+        
+        cache_schedule_result(job['cache_key'], job['user_ids'], generated_schedules, solve_info)
+        with app.app_context():
+            save_generated_schedules(job['week_start'], job['week_end'], generated_schedules)
+        
+        job['result'] = {
+            'shifts': len(generated_schedules),
+            'solver': solve_info
+        }
+        job['status'] = 'completed'
+    except Exception as e:
+        print(f"Schedule job {job['id']} failed: {e}")
+        job['error'] = str(e)
+        job['status'] = 'failed'
+    finally:
+        job['finished_at'] = time.time()
+
+def schedule_job_to_dict(job):
+    """Serialize a job's status and latest intermediate solution"""
+    status = job['status']
+    latest = None
+    if not job['future'].done():
+        try:
+            status = job['progress'].get('status', status)
+            latest = job['progress'].get('latest')
+        except Exception:
+            pass
+    
+    return {
+        'job_id': job['id'],
+        'status': status,
+        'week_start': job['week_start'].isoformat(),
+        'week_end': job['week_end'].isoformat(),
+        'created_at': datetime.fromtimestamp(job['created_at']).isoformat(),
+        'finished_at': datetime.fromtimestamp(job['finished_at']).isoformat() if job['finished_at'] else None,
+        'intermediate': latest,
+        'result': job['result'],
+        'error': job['error']
+    }
+
+# Small, rarely written tables kept in memory until their next write. Only the
+# process that handled the write drops its copy, so with more than one web
+# process (the Procfile runs one) the others serve stale templates and demand
+# until they restart.
+reference_cache = {}
+_reference_lock = threading.Lock()
+
+def cached_reference(name, load):
+    """reference_cache[name], filled by calling load() on first use"""
+    with _reference_lock:
+        if name not in reference_cache:
+            reference_cache[name] = load()
+        return reference_cache[name]
+
+def invalidate_reference(name):
+    with _reference_lock:
+        reference_cache.pop(name, None)
+
+# Versioned API responses: writes bump their resource's counter, reads send
+# it as the ETag and reuse the serialized body until the next bump
+resource_versions = {'employees': 0, 'schedules': 0}
+response_cache = OrderedDict()
+_resource_lock = threading.Lock()
+# Tells this process's counters apart from another worker's or a restart's
+RESOURCE_VERSION_TOKEN = uuid.uuid4().hex[:8]
+
+def bump_version(*resources):
+    """Mark resources as changed; call after the write is committed"""
+    with _resource_lock:
+        for resource in resources:
+            resource_versions[resource] += 1
+        for key in [key for key in response_cache if key[0] in resources]:
+            del response_cache[key]
+
+def versioned_json(resource, key, build):
+    """
+    JSON response for `resource` (`key` tells apart e.g. weeks) tagged with
+    its version: 304 when If-None-Match has it, else the cached body, with
+    build() only called to fill the cache
+    """
+    version = resource_versions[resource]
+    etag = f'{resource}-{RESOURCE_VERSION_TOKEN}-{version}-{key}'
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        with _resource_lock:
+            cached = response_cache.get((resource, key))
+            if cached is not None and cached[0] == version:
+                response_cache.move_to_end((resource, key))
+        if cached is not None and cached[0] == version:
+            body = cached[1]
+        else:
+            body = app.json.dumps(build())
+            with _resource_lock:
+                # Skip bodies that a concurrent write already made stale
+                if resource_versions[resource] == version and app.config['RESPONSE_CACHE_SIZE'] > 0:
+                    response_cache[resource, key] = (version, body)
+                    while len(response_cache) > app.config['RESPONSE_CACHE_SIZE']:
+                        response_cache.popitem(last=False)
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+class ScheduleBroadcaster:
+    """
+    In-process fan-out of schedule change events to subscribers of a week.
+    
+    Every subscriber has a bounded queue; when a slow client's queue is
+    full its oldest event is dropped, so one stalled connection never holds
+    up a writer or grows without bound. At most max_streams subscribers are
+    open at once, since each one holds a server thread.
+    """
+    
+    def __init__(self, queue_size, max_streams):
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+        self.subscribers = {}
+        self.lock = threading.Lock()
+    
+    def subscribe(self, week_start):
+        """A new subscriber queue, or None when max_streams are already open"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self.lock:
+            if sum(len(week) for week in self.subscribers.values()) >= self.max_streams:
+                return None
+            self.subscribers.setdefault(week_start, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, week_start, subscriber):
+        with self.lock:
+            week = self.subscribers.get(week_start, set())
+            week.discard(subscriber)
+            if not week:
+                self.subscribers.pop(week_start, None)
+    
+    def publish(self, week_start, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(week_start, ()))
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+schedule_events = ScheduleBroadcaster(app.config['EVENT_QUEUE_SIZE'], app.config['EVENT_MAX_STREAMS'])
+
+def publish_schedule_change(event_type, first_day, last_day=None, **data):
+    """Tell every subscriber of the weeks from first_day to last_day what changed"""
+    week_start = first_day - timedelta(days=first_day.weekday())
+    while week_start <= (last_day or first_day):
+        schedule_events.publish(week_start, dict(
+            data, type=event_type, week_start=week_start.isoformat(), version=resource_versions['schedules']
+        ))
+        week_start += timedelta(weeks=1)
+
+def load_shift_templates():
+    """
+    Shift templates as {name: {'start': 'HH:MM', 'end': 'HH:MM'}}, or the
+    built-in DEFAULT_SHIFT_DEFINITIONS while the table is empty
+    """
+    def load():
+        rows = db.session.execute(select(ShiftTemplate.name, ShiftTemplate.start_time, ShiftTemplate.end_time))
+        return {name: {'start': start, 'end': end} for name, start, end in rows} or dict(DEFAULT_SHIFT_DEFINITIONS)
+    return cached_reference('shift_templates', load)
+
+def load_staffing_demand():
+    """
+    The staffing_demand table as {day: {shift_type: [min_staff, max_staff]}},
+    where day is a weekday name or an ISO date. Cached per process (see
+    reference_cache).
+    """
+    def load():
+        table = {}
+        rows = db.session.execute(select(
+            StaffingDemand.day_of_week, StaffingDemand.date, StaffingDemand.shift_type,
+            StaffingDemand.min_staff, StaffingDemand.max_staff
+        ))
+        for day_of_week, day, shift_type, min_staff, max_staff in rows:
+            key = day.isoformat() if day else DAYS[day_of_week]
+            table.setdefault(key, {})[shift_type] = [min_staff, max_staff]
+        return table
+    return cached_reference('staffing_demand', load)
+
+def parse_demand_rows(rows, shifts):
+    """
+    Validate demand rows with keys day (weekday name or ISO date),
+    shift_type (one of `shifts`), min_staff and optional max_staff. A later
+    row for the same day and shift replaces an earlier one. Raises
+    ValueError naming the row.
+    """
+    parsed = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            day = str(row.get('day') or '').strip().lower()
+            if day in DAYS:
+                day_of_week, day_date = DAYS.index(day), None
+            else:
+                try:
+                    day_of_week, day_date = None, date.fromisoformat(day)
+                except ValueError:
+                    raise ValueError(f"unknown day '{row.get('day')}'")
+            
+            shift_type = str(row.get('shift_type') or '').strip()
+            if shift_type not in shifts:
+                raise ValueError(f"unknown shift_type '{row.get('shift_type')}'")
+            
+            if row.get('min_staff') in (None, ''):
+                raise ValueError('min_staff is required')
+            min_staff = int(row['min_staff'])
+            max_staff = int(row['max_staff']) if row.get('max_staff') not in (None, '') else None
+            if min_staff < 0 or (max_staff is not None and max_staff < min_staff):
+                raise ValueError('min_staff must be between 0 and max_staff')
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'Row {number}: {e}')
+        
+        parsed[day_of_week, day_date, shift_type] = {
+            'day_of_week': day_of_week,
+            'date': day_date,
+            'shift_type': shift_type,
+            'min_staff': min_staff,
+            'max_staff': max_staff
+        }
+    return list(parsed.values())
+
+def import_staffing_demand(rows, replace=False):
+    """
+    Upsert parsed demand rows in one transaction: rows for the same day and
+    shift are replaced, or the whole table is with `replace`.
+    """
+    weekday_keys = [(row['day_of_week'], row['shift_type']) for row in rows if row['date'] is None]
+    date_keys = [(row['date'], row['shift_type']) for row in rows if row['date'] is not None]
     
-    # Relationship
-    user = db.relationship('User', backref=db.backref('schedules', lazy=True))
+    try:
+        if replace:
+            db.session.execute(delete(StaffingDemand), execution_options={'synchronize_session': False})
+        else:
+            if weekday_keys:
+                db.session.execute(
+                    delete(StaffingDemand).where(
+                        tuple_(StaffingDemand.day_of_week, StaffingDemand.shift_type).in_(weekday_keys)
+                    ),
+                    execution_options={'synchronize_session': False}
+                )
+            if date_keys:
+                db.session.execute(
+                    delete(StaffingDemand).where(tuple_(StaffingDemand.date, StaffingDemand.shift_type).in_(date_keys)),
+                    execution_options={'synchronize_session': False}
+                )
+        
+        if rows:
+            db.session.execute(insert(StaffingDemand.__table__), rows)
+        
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        invalidate_reference('staffing_demand')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'user_name': self.user.name if self.user else 'Unknown',
-            'date': self.date.isoformat(),
-            'shift_type': self.shift_type,
-            'start_time': self.start_time,
-            'end_time': self.end_time,
-            'hours': self.hours
-        }
+    return len(rows)
 
-# Core utility functions
-def get_week_dates(week_offset=0):
-    """Get start and end dates for a given week offset from current week"""
-    today = date.today()
-    days_since_monday = today.weekday()
-    monday = today - timedelta(days=days_since_monday)
-    week_start = monday + timedelta(weeks=week_offset)
-    week_end = week_start + timedelta(days=6)
-    return week_start, week_end
+# Columns an employee import row may set (besides the username key)
+EMPLOYEE_IMPORT_FIELDS = (
+    'name', 'email', 'phone', 'max_hours_per_week', 'can_work_weekends', 'preferred_shift_type',
+    'department', 'availability', 'password'
+)
+EMPLOYEE_IMPORT_TEXT_FIELDS = ('name', 'email', 'phone', 'preferred_shift_type', 'department', 'password')
+DEFAULT_EMPLOYEE_PASSWORD = 'password123'
 
-def calculate_shift_hours(start_time, end_time):
-    """Calculate hours between two time strings"""
-    start = datetime.strptime(start_time, "%H:%M")
-    end = datetime.strptime(end_time, "%H:%M")
-    
-    # Handle overnight shifts
-    if end < start:
-        end += timedelta(days=1)
-    
-    delta = end - start
-    return delta.total_seconds() / 3600
+_hash_lock = threading.Lock()
+_hash_executor = None
+
+def get_hash_executor():
+    """Lazily start the password hashing process pool"""
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(
+                max_workers=app.config['PASSWORD_HASH_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _hash_executor
+
+def hash_passwords(passwords):
+    """generate_password_hash for every password, on the hashing pool for large batches"""
+    if len(passwords) < app.config['PASSWORD_HASH_POOL_THRESHOLD']:
+        return [generate_password_hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (app.config['PASSWORD_HASH_WORKERS'] * 4))
+    return list(get_hash_executor().map(generate_password_hash, passwords, chunksize=chunksize))
 
-def generate_shifts(employees, week_start_date, constraints=None):
+def parse_employee_row(row):
     """
-    Generate optimal shift schedule using OR-Tools
+    Validated column values for one import row, only for the fields it
+    sets; blank CSV cells leave a field unset. Raises ValueError.
     """
-    if not employees:
-        return []
+    values = {}
+    for field in EMPLOYEE_IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            continue
+        
+        if field in EMPLOYEE_IMPORT_TEXT_FIELDS:
+            if not isinstance(value, str):
+                raise ValueError(f'{field} must be a string')
+        elif field == 'max_hours_per_week':
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError(f"max_hours_per_week must be a whole number, not '{value}'")
+            value = int(value)
+            if not 0 < value <= 168:
+                raise ValueError('max_hours_per_week must be between 1 and 168')
+        elif field == 'can_work_weekends' and not isinstance(value, bool):
+            if str(value).lower() not in ('true', 'false', '1', '0', 'yes', 'no'):
+                raise ValueError(f"can_work_weekends must be true or false, not '{value}'")
+            value = str(value).lower() in ('true', '1', 'yes')
+        elif field == 'availability':
+            if isinstance(value, dict):
+                value = json.dumps(value)
+            try:
+                values['availability_mask'] = parse_availability(value, load_shift_templates())
+            except ValueError as e:
+                raise ValueError(f'invalid availability: {e}')
+        values[field] = value
+    return values
+
+def import_flag(value):
+    """An import option from a query string, form field or JSON; only false, 0 and no turn it off"""
+    return str(value).strip().lower() not in ('false', '0', 'no')
+
+def import_employees(rows, update_existing=True):
+    """
+    Create or update employees from import rows keyed by username.
+    
+    Existing usernames and emails are looked up in one query, passwords
+    are hashed together (see hash_passwords) and every insert and update
+    goes through in a single transaction. Rows that fail validation are
+    reported and skipped; the others are still imported. Returns one
+    {'row', 'username', 'status', ...} result per row, status being
+    created, updated or error.
+    """
+    results = []
+    parsed = {}
+    for number, row in enumerate(rows, start=1):
+        username = row.get('username')
+        username = username.strip() if isinstance(username, str) else ''
+        try:
+            if not username:
+                raise ValueError('username is required')
+            if username in parsed:
+                raise ValueError(f'duplicate of row {parsed[username][0]}')
+            parsed[username] = (number, parse_employee_row(row))
+        except (AttributeError, TypeError, ValueError) as e:
+            results.append({'row': number, 'username': username or None, 'status': 'error', 'message': str(e)})
+    
+    emails = {values['email'] for _, values in parsed.values() if 'email' in values}
+    existing = db.session.execute(
+        select(User.id, User.username, User.email, User.role).where(
+            or_(User.username.in_(list(parsed)), User.email.in_(list(emails)))
+        )
+    ).all()
+    by_username = {row.username: row for row in existing}
+    email_owners = {row.email: row.username for row in existing}
+    
+    inserts = []
+    updates = []
+    for username, (number, values) in parsed.items():
+        current = by_username.get(username)
+        email = values.get('email')
+        if current is not None and current.role != 'employee':
+            error = 'username belongs to a non-employee account'
+        elif current is not None and not update_existing:
+            error = 'username already exists'
+        elif current is None and not ('name' in values and 'email' in values):
+            error = 'name and email are required for new employees'
+        elif email is not None and email_owners.setdefault(email, username) != username:
+            error = f'email {email} is already used by {email_owners[email]}'
+        else:
+            error = None
+        if error:
+            results.append({'row': number, 'username': username, 'status': 'error', 'message': error})
+        elif current is None:
+            inserts.append((number, username, values))
+        else:
+            updates.append((number, username, current.id, values))
     
-    # Default shift definitions
-    shift_definitions = {
-        'opening': {'start': '08:00', 'end': '16:00'},
-        'midday': {'start': '12:00', 'end': '20:00'},
-        'closing': {'start': '16:00', 'end': '00:00'}
+    hashes = iter(hash_passwords(
+        [values.get('password', DEFAULT_EMPLOYEE_PASSWORD) for _, _, values in inserts]
+        + [values['password'] for _, _, _, values in updates if 'password' in values]
+    ))
+    # executemany needs the same keys in every row
+    defaults = {
+        'role': 'employee',
+        'phone': None,
+        'max_hours_per_week': 40,
+        'can_work_weekends': True,
+        'preferred_shift_type': 'any',
+        'department': None,
+        'availability': None,
+        'availability_mask': None
     }
+    insert_rows = [
+        dict(
+            defaults, username=username, password_hash=next(hashes),
+            **{field: value for field, value in values.items() if field != 'password'}
+        )
+        for _, username, values in inserts
+    ]
+    update_rows = []
+    for _, _, user_id, values in updates:
+        changes = {field: value for field, value in values.items() if field != 'password'}
+        if 'password' in values:
+            changes['password_hash'] = next(hashes)
+        update_rows.append(dict(changes, id=user_id))
+    
+    try:
+        if insert_rows:
+            db.session.execute(insert(User.__table__), insert_rows)
+        if update_rows:
+            db.session.execute(update(User), update_rows)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
     
-    if constraints:
-        shift_definitions.update(constraints.get('shift_definitions', {}))
+    created_ids = dict(db.session.execute(
+        select(User.username, User.id).where(User.username.in_([username for _, username, _ in inserts]))
+    ).all()) if inserts else {}
+    results.extend(
+        {'row': number, 'username': username, 'status': 'created', 'id': created_ids.get(username)}
+        for number, username, _ in inserts
+    )
+    results.extend(
+        {'row': number, 'username': username, 'status': 'updated', 'id': user_id}
+        for number, username, user_id, _ in updates
+    )
     
-    # Days of the week
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    shifts = ['opening', 'midday', 'closing']
+    # Bulk UPDATEs skip the ORM events that drop cached solver results
+    for _, _, user_id, _ in updates:
+        schedule_cache.invalidate_user(user_id)
+    if inserts or updates:
+        bump_version('employees', 'schedules')
+    return sorted(results, key=lambda result: result['row'])
+
+SCHEDULE_COLUMNS = ('user_id', 'date', 'shift_type', 'start_time', 'end_time', 'hours')
+
+def save_generated_schedules(week_start, week_end, generated_schedules):
+    """
+    Atomically replace a date range's schedules with freshly generated ones.
     
-    schedules = []
+    Rows go in as a single executemany INSERT instead of one ORM object per
+    shift; the delete and insert share one transaction.
+    """
+    rows = [{column: entry[column] for column in SCHEDULE_COLUMNS} for entry in generated_schedules]
     
     try:
-        # Create CP-SAT model
-        model = cp_model.CpModel()
-        
-        # Variables: employee_shift[employee][day][shift] = 1 if assigned
-        employee_shift = {}
-        for emp in employees:
-            employee_shift[emp.id] = {}
-            for day_idx, day in enumerate(days):
-                employee_shift[emp.id][day_idx] = {}
-                for shift in shifts:
-                    employee_shift[emp.id][day_idx][shift] = model.NewBoolVar(
-                        f'emp_{emp.id}_day_{day_idx}_shift_{shift}'
-                    )
+        # Clear existing schedules for this range
+        db.session.execute(
+            delete(Schedule).where(Schedule.date >= week_start, Schedule.date <= week_end),
+            execution_options={'synchronize_session': False}
+        )
         
-        # Constraints
+        # Save to database
+        if rows:
+            db.session.execute(insert(Schedule.__table__), rows)
         
-        # 1. Each shift must have at least one employee
-        for day_idx in range(7):
-            for shift in shifts:
-                model.Add(
-                    sum(employee_shift[emp.id][day_idx][shift] for emp in employees) >= 1
-                )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    bump_version('schedules')
+    publish_schedule_change('schedules_generated', week_start, week_end, shifts=len(rows))
+    return len(rows)
+
+def repair_week(week_start, constraints=None):
+    """
+    Repair one stored week in place (see repair_schedule): released rows are
+    deleted and the new assignments inserted in one transaction. With
+    constraints['partition'] each department is repaired on its own, as
+    solve_partitions generates it; pass the flag the week was generated with
+    """
+    rows = db.session.query(
+        Schedule.id, Schedule.user_id, Schedule.date, Schedule.shift_type, Schedule.start_time, Schedule.end_time
+    ).filter(
+        Schedule.date >= week_start,
+        Schedule.date < week_start + timedelta(weeks=1)
+    ).all()
+    employees = User.query.filter_by(role='employee').all()
+    demand = load_staffing_demand()
+    templates = load_shift_templates()
+    
+    # Rows of employees that are gone belong to no partition
+    user_ids = {emp.id for emp in employees}
+    released = [row.id for row in rows if row.user_id not in user_ids]
+    added = []
+    results = {}
+    for name, members in partition_employees(employees, constraints).items():
+        member_ids = {emp.id for emp in members}
+        existing = {
+            row.id: (row.user_id, (row.date - week_start).days, row.shift_type, row.start_time, row.end_time)
+            for row in rows if row.user_id in member_ids
+        }
+        info = {'employees': len(members)}
+        partition_added, partition_released = repair_schedule(
+            members, week_start, existing, constraints, info, demand, templates
+        )
+        added.extend(partition_added)
+        released.extend(partition_released)
+        results[name] = info
+    
+    try:
+        if released:
+            db.session.execute(
+                delete(Schedule).where(Schedule.id.in_(released)),
+                execution_options={'synchronize_session': False}
+            )
+        if added:
+            db.session.execute(
+                insert(Schedule.__table__),
+                [{column: entry[column] for column in SCHEDULE_COLUMNS} for entry in added]
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    bump_version('schedules')
+    publish_schedule_change('schedules_repaired', week_start, added=len(added), released=len(released))
+    statuses = [info['status'] for info in results.values()]
+    solve_info = {
+        'status': next((status for status in statuses if status != 'OPTIMAL'), 'OPTIMAL'),
+        'wall_time': sum(info['wall_time'] for info in results.values()),
+        'kept': sum(info['kept'] for info in results.values()),
+        'released': len(released),
+        'open_positions': sum(info['open_positions'] for info in results.values()),
+        'unfilled_positions': sum(info['unfilled_positions'] for info in results.values()),
+        'partitions': results
+    }
+    return {'week_start': week_start.isoformat(), 'added': len(added), 'solver': solve_info}
+
+def upgrade_db():
+    """Bring an existing database up to the current models in place"""
+    created = []
+    with app.app_context():
+        inspector = inspect(db.engine)
         
-        # 2. Employee weekly hour limits
-        for emp in employees:
-            weekly_hours = []
-            for day_idx in range(7):
-                for shift in shifts:
-                    shift_hours = calculate_shift_hours(
-                        shift_definitions[shift]['start'],
-                        shift_definitions[shift]['end']
-                    )
-                    weekly_hours.append(
-                        employee_shift[emp.id][day_idx][shift] * int(shift_hours)
-                    )
-            
-            model.Add(sum(weekly_hours) <= emp.max_hours_per_week or 40)
+        # Tables added to the models after the database was first created
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                table.create(db.engine)
+                created.append(table.name)
         
-        # 3. No employee works consecutive shifts on the same day
-        for emp in employees:
-            for day_idx in range(7):
-                # Can't work opening and midday on same day
-                model.Add(
-                    employee_shift[emp.id][day_idx]['opening'] +
-                    employee_shift[emp.id][day_idx]['midday'] <= 1
-                )
-                # Can't work midday and closing on same day
-                model.Add(
-                    employee_shift[emp.id][day_idx]['midday'] +
-                    employee_shift[emp.id][day_idx]['closing'] <= 1
-                )
+        # Columns added to the models after the table was first created
+        for table in (User.__table__, Schedule.__table__):
+            if not inspector.has_table(table.name):
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            required = {column.name for column in table.columns if not column.nullable}
+            if not required <= columns:
+                print(f"⚠️  Skipping {table.name}: the table uses an older schema")
+                continue
+            for column in table.columns:
+                if column.name not in columns:
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    with db.engine.begin() as connection:
+                        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    created.append(f'{table.name}.{column.name}')
         
-        # 4. Weekend constraints
-        for emp in employees:
-            if not emp.can_work_weekends:
-                for shift in shifts:
-                    model.Add(employee_shift[emp.id][5][shift] == 0)  # Saturday
-                    model.Add(employee_shift[emp.id][6][shift] == 0)  # Sunday
+        if 'users.availability_mask' in created:
+            backfill_availability_masks()
+        if 'shift_templates' in created:
+            seed_shift_templates()
         
-        # Solve
-        solver = cp_model.CpSolver()
-        status = solver.Solve(model)
+        if not inspector.has_table(Schedule.__tablename__):
+            return created
         
-        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            # Extract solution
-            for emp in employees:
-                for day_idx, day in enumerate(days):
-                    for shift in shifts:
-                        if solver.Value(employee_shift[emp.id][day_idx][shift]) == 1:
-                            shift_date = week_start_date + timedelta(days=day_idx)
-                            shift_hours = calculate_shift_hours(
-                                shift_definitions[shift]['start'],
-                                shift_definitions[shift]['end']
-                            )
-                            
-                            schedules.append({
-                                'user_id': emp.id,
-                                'user_name': emp.name,
-                                'date': shift_date,
-                                'shift_type': shift,
-                                'start_time': shift_definitions[shift]['start'],
-                                'end_time': shift_definitions[shift]['end'],
-                                'hours': shift_hours
-                            })
+        columns = {column['name'] for column in inspect(db.engine).get_columns(Schedule.__tablename__)}
+        existing = {index['name'] for index in inspector.get_indexes(Schedule.__tablename__)}
         
-        else:
-            # Fallback: Simple round-robin assignment
-            for day_idx, day in enumerate(days):
-                shift_date = week_start_date + timedelta(days=day_idx)
-                for shift_idx, shift in enumerate(shifts):
-                    emp_idx = (day_idx + shift_idx) % len(employees)
-                    emp = employees[emp_idx]
-                    
-                    shift_hours = calculate_shift_hours(
-                        shift_definitions[shift]['start'],
-                        shift_definitions[shift]['end']
-                    )
-                    
-                    schedules.append({
-                        'user_id': emp.id,
-                        'user_name': emp.name,
-                        'date': shift_date,
-                        'shift_type': shift,
-                        'start_time': shift_definitions[shift]['start'],
-                        'end_time': shift_definitions[shift]['end'],
-                        'hours': shift_hours
-                    })
-    
-    except Exception as e:
-        print(f"OR-Tools error: {e}")
-        # Fallback scheduling
-        for day_idx, day in enumerate(days):
-            shift_date = week_start_date + timedelta(days=day_idx)
-            for shift_idx, shift in enumerate(shifts):
-                if employees:
-                    emp_idx = (day_idx + shift_idx) % len(employees)
-                    emp = employees[emp_idx]
-                    
-                    shift_hours = calculate_shift_hours(
-                        shift_definitions[shift]['start'],
-                        shift_definitions[shift]['end']
-                    )
-                    
-                    schedules.append({
-                        'user_id': emp.id,
-                        'user_name': emp.name,
-                        'date': shift_date,
-                        'shift_type': shift,
-                        'start_time': shift_definitions[shift]['start'],
-                        'end_time': shift_definitions[shift]['end'],
-                        'hours': shift_hours
-                    })
+        for index in Schedule.__table__.indexes:
+            if index.name in existing:
+                continue
+            if not {column.name for column in index.columns} <= columns:
+                print(f"⚠️  Skipping {index.name}: the schedules table uses an older schema")
+                continue
+            index.create(db.engine)
+            created.append(index.name)
+        
+        if created:
+            # Refresh planner statistics so SQLite picks the new indexes up
+            with db.engine.begin() as connection:
+                connection.execute(text('ANALYZE'))
     
-    return schedules
+    return created
+
+def backfill_availability_masks():
+    """Parse stored availability JSON into availability_mask"""
+    for user in User.query.filter(User.availability.isnot(None)):
+        try:
+            user.availability_mask = parse_availability(user.availability, load_shift_templates())
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable availability for {user.username}: {e}")
+    db.session.commit()
+
+def seed_shift_templates():
+    """Store the built-in shift definitions as editable templates"""
+    db.session.execute(insert(ShiftTemplate.__table__), [
+        {'name': name, 'start_time': definition['start'], 'end_time': definition['end']}
+        for name, definition in DEFAULT_SHIFT_DEFINITIONS.items()
+    ])
+    db.session.commit()
+    invalidate_reference('shift_templates')
 
 # Initialize database
 def init_db():
@@ -285,6 +2677,7 @@ def init_db():
     with app.app_context():
         # Create tables
         db.create_all()
+        upgrade_db()
         
         # Check if admin user exists
         admin = User.query.filter_by(username='admin').first()
@@ -317,20 +2710,123 @@ def init_db():
                 db.session.add(employee)
             
             db.session.commit()
+            if not ShiftTemplate.query.first():
+                seed_shift_templates()
             print("✅ Database initialized with sample data")
 
+# SPA shell and static assets
+StaticAsset = namedtuple('StaticAsset', ['encodings', 'etag', 'mimetype', 'immutable'])
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_REFERENCE = re.compile(r'((?:href|src)=["\'])/?static/([^"\'?#]+)')
+
+_static_assets = None
+_static_assets_lock = threading.Lock()
+
+def compress_asset(body):
+    """{encoding: bytes} with every encoding that is smaller than the original"""
+    encodings = {'identity': body}
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        encodings['gzip'] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body)
+        if len(compressed) < len(body):
+            encodings['br'] = compressed
+    return encodings
+
+def make_asset(body, mimetype, immutable=False):
+    digest = hashlib.sha256(body).hexdigest()[:16]
+    return StaticAsset(compress_asset(body), digest, mimetype, immutable)
+
+def hashed_asset_name(filename, digest):
+    """styles.css -> styles.<digest>.css"""
+    root, extension = os.path.splitext(filename)
+    return f'{root}.{digest}{extension}'
+
+def build_static_assets():
+    """
+    Read index.html and everything under static/ into memory, compressed.
+    
+    Each static file is served under its own name (revalidated on every
+    use) and under a content-hashed name that can be cached forever; the
+    shell's static references are rewritten to the hashed names. The
+    shipped index.html only references styles.css; its demo logic is
+    inline and static/js/spa-app.js is not loaded by it. Returns
+    {'shell': StaticAsset, 'files': {filename: StaticAsset}, 'urls': {filename: hashed filename}}.
+    """
+    static_root = os.path.join(app.root_path, 'static')
+    files = {}
+    urls = {}
+    for directory, _, names in os.walk(static_root):
+        for name in names:
+            path = os.path.join(directory, name)
+            filename = os.path.relpath(path, static_root).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            asset = make_asset(body, mimetype)
+            files[filename] = asset
+            urls[filename] = hashed_asset_name(filename, asset.etag)
+            files[urls[filename]] = asset._replace(immutable=True)
+    
+    with open(os.path.join(app.root_path, 'index.html'), 'r') as f:
+        shell = STATIC_REFERENCE.sub(
+            lambda match: match.group(1) + '/static/' + urls.get(match.group(2), match.group(2)),
+            f.read()
+        )
+    return {'shell': make_asset(shell.encode('utf-8'), 'text/html'), 'files': files, 'urls': urls}
+
+def get_static_assets():
+    """The cached asset table, built on first use (or every call with STATIC_ASSET_CACHE off)"""
+    global _static_assets
+    if not app.config['STATIC_ASSET_CACHE']:
+        return build_static_assets()
+    with _static_assets_lock:
+        if _static_assets is None:
+            _static_assets = build_static_assets()
+        return _static_assets
+
+def asset_url(filename):
+    """Content-hashed URL of a file under static/"""
+    return '/static/' + get_static_assets()['urls'].get(filename, filename)
+
+def send_asset(asset):
+    """
+    Serve a cached asset in the best encoding the client accepts, with a
+    strong per-encoding ETag and a 304 when If-None-Match already has it
+    """
+    encoding = next(
+        (name for name in ('br', 'gzip') if name in asset.encodings and name in request.accept_encodings),
+        'identity'
+    )
+    etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+    
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(asset.encodings[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if asset.immutable else 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 # Routes
 
 @app.route('/')
 def index():
     """Serve the main SPA page"""
-    with open('index.html', 'r') as f:
-        return f.read()
+    return send_asset(get_static_assets()['shell'])
 
 @app.route('/static/<path:filename>')
 def static_files(filename):
-    """Serve static files"""
-    return send_from_directory('static', filename)
+    """Serve static files, from memory when they were present at startup"""
+    asset = get_static_assets()['files'].get(filename)
+    if asset is None:
+        return send_from_directory('static', filename)
+    return send_asset(asset)
 
 # API Routes
 
@@ -356,9 +2852,10 @@ def login():
 
 @app.route('/api/employees')
 def get_employees():
-    """Get all employees"""
-    employees = User.query.filter_by(role='employee').all()
-    return jsonify([emp.to_dict() for emp in employees])
+    """Get all employees (ETag / 304 and cached JSON, see versioned_json)"""
+    def build():
+        return [emp.to_dict() for emp in User.query.filter_by(role='employee').all()]
+    return versioned_json('employees', 'all', build)
 
 @app.route('/api/employees', methods=['POST'])
 def add_employee():
@@ -377,15 +2874,61 @@ def add_employee():
         role='employee',
         max_hours_per_week=data.get('max_hours_per_week', 40),
         can_work_weekends=data.get('can_work_weekends', True),
-        preferred_shift_type=data.get('preferred_shift_type', 'any')
+        preferred_shift_type=data.get('preferred_shift_type', 'any'),
+        department=data.get('department') or None
     )
     employee.set_password(data.get('password', 'password123'))
+    try:
+        employee.set_availability(data.get('availability'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid availability: {e}'}), 400
     
     db.session.add(employee)
     db.session.commit()
+    bump_version('employees')
     
     return jsonify({'success': True, 'employee': employee.to_dict()})
 
+@app.route('/api/employees/import', methods=['POST'])
+def import_employees_route():
+    """Bulk create or update employees
+    
+    Accepts CSV (an uploaded `file` or a text/csv body) with a username
+    column plus any of name, email, phone, max_hours_per_week,
+    can_work_weekends, preferred_shift_type, department, availability and
+    password, or a JSON array of the same objects (or {"employees": [...]}).
+    Existing usernames are updated unless `update=false`. Returns a result
+    per row.
+    """
+    update_existing = import_flag(request.args.get('update', True))
+    if 'file' in request.files:
+        rows = list(csv.DictReader(io.StringIO(request.files['file'].read().decode('utf-8-sig'))))
+        update_existing = import_flag(request.form.get('update', update_existing))
+    elif request.is_json:
+        data = request.get_json()
+        if isinstance(data, dict):
+            update_existing = import_flag(data.get('update', update_existing))
+            data = data.get('employees', [])
+        rows = data if isinstance(data, list) else []
+    else:
+        rows = list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    
+    if not rows:
+        return jsonify({'success': False, 'message': 'No employee rows found'}), 400
+    if not all(isinstance(row, dict) for row in rows):
+        return jsonify({'success': False, 'message': 'Each employee must be an object'}), 400
+    
+    results = import_employees(rows, update_existing)
+    counts = {status: sum(result['status'] == status for result in results) for status in ('created', 'updated', 'error')}
+    return jsonify({
+        'success': counts['error'] < len(results),
+        'message': f"Created {counts['created']}, updated {counts['updated']}, {counts['error']} rows with errors",
+        'created': counts['created'],
+        'updated': counts['updated'],
+        'errors': counts['error'],
+        'results': results
+    }), 200 if counts['error'] < len(results) else 400
+
 @app.route('/api/employees/<int:emp_id>', methods=['PUT'])
 def update_employee(emp_id):
     """Update employee"""
@@ -398,11 +2941,21 @@ def update_employee(emp_id):
     employee.max_hours_per_week = data.get('max_hours_per_week', employee.max_hours_per_week)
     employee.can_work_weekends = data.get('can_work_weekends', employee.can_work_weekends)
     employee.preferred_shift_type = data.get('preferred_shift_type', employee.preferred_shift_type)
+    if 'department' in data:
+        employee.department = data['department'] or None
+    
+    if 'availability' in data:
+        try:
+            employee.set_availability(data['availability'])
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Invalid availability: {e}'}), 400
     
     if data.get('password'):
         employee.set_password(data['password'])
     
     db.session.commit()
+    # Schedules embed the employee's name
+    bump_version('employees', 'schedules')
     
     return jsonify({'success': True, 'employee': employee.to_dict()})
 
@@ -411,34 +2964,196 @@ def delete_employee(emp_id):
     """Delete employee"""
     employee = User.query.get_or_404(emp_id)
     
+    # Weeks from this one on that lose shifts, for ?repair=true (add ?partition=true
+    # for weeks that were generated by department)
+    this_week, _ = get_week_dates(0)
+    affected = {
+        shift_date - timedelta(days=shift_date.weekday())
+        for shift_date, in db.session.query(Schedule.date).filter(
+            Schedule.user_id == emp_id, Schedule.date >= this_week
+        ).distinct()
+    }
+    
     # Delete associated schedules
     Schedule.query.filter_by(user_id=emp_id).delete()
     
     db.session.delete(employee)
     db.session.commit()
+    bump_version('employees', 'schedules')
+    
+    if request.args.get('repair', 'false').lower() in ('1', 'true', 'yes'):
+        constraints = {'partition': request.args.get('partition', 'false').lower() in ('1', 'true', 'yes')}
+        return jsonify({
+            'success': True,
+            'repaired': [repair_week(week_start, constraints) for week_start in sorted(affected)]
+        })
     
     return jsonify({'success': True})
 
 @app.route('/api/schedules')
 def get_schedules():
-    """Get schedules for a specific week"""
+    """Get schedules for a specific week (ETag / 304 and cached JSON per week)"""
     week_offset = request.args.get('week', 0, type=int)
     week_start, week_end = get_week_dates(week_offset)
     
-    schedules = Schedule.query.filter(
-        Schedule.date >= week_start,
-        Schedule.date <= week_end
-    ).order_by(Schedule.date, Schedule.start_time).all()
+    def build():
+        # Join users in the same query so to_dict() doesn't lazy-load each one
+        schedules = Schedule.query.outerjoin(Schedule.user).options(
+            contains_eager(Schedule.user)
+        ).filter(
+            Schedule.date >= week_start,
+            Schedule.date <= week_end
+        ).order_by(Schedule.date, Schedule.start_time).all()
+        
+        return {
+            'schedules': [schedule.to_dict() for schedule in schedules],
+            'week_start': week_start.isoformat(),
+            'week_end': week_end.isoformat()
+        }
+    return versioned_json('schedules', week_start.isoformat(), build)
+
+SCHEDULE_ROW_COLUMNS = ('id', 'user_id', 'user_name', 'date', 'shift_type', 'start_time', 'end_time', 'hours')
+
+@app.route('/api/schedules/rows')
+def get_schedule_rows():
+    """Get a week's schedules as plain column tuples (no ORM objects)"""
+    week_offset = request.args.get('week', 0, type=int)
+    week_start, week_end = get_week_dates(week_offset)
+    
+    def build():
+        rows = db.session.query(
+            Schedule.id, Schedule.user_id, User.name, Schedule.date, Schedule.shift_type,
+            Schedule.start_time, Schedule.end_time, Schedule.hours
+        ).outerjoin(User, Schedule.user_id == User.id).filter(
+            Schedule.date >= week_start,
+            Schedule.date <= week_end
+        ).order_by(Schedule.date, Schedule.start_time).all()
+        
+        return {
+            'columns': SCHEDULE_ROW_COLUMNS,
+            'rows': [
+                [id, user_id, user_name or 'Unknown', shift_date.isoformat(), shift_type, start_time, end_time, hours]
+                for id, user_id, user_name, shift_date, shift_type, start_time, end_time, hours in rows
+            ],
+            'week_start': week_start.isoformat(),
+            'week_end': week_end.isoformat()
+        }
+    return versioned_json('schedules', 'rows-' + week_start.isoformat(), build)
+
+def encode_export_cursor(row):
+    """Opaque keyset cursor for the (date, start_time, id) of the last exported row"""
+    key = json.dumps([row.date.isoformat(), row.start_time, row.id])
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+def decode_export_cursor(cursor):
+    try:
+        shift_date, start_time, schedule_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(start_time, str):
+            raise ValueError('Invalid cursor')
+        return date.fromisoformat(shift_date), start_time, int(schedule_id)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+def export_query(start, end, user_id=None, after=None):
+    """
+    Schedule rows (SCHEDULE_ROW_COLUMNS) between two dates in
+    (date, start_time, id) order, which the (date, start_time) index serves;
+    `after` continues from a decoded cursor
+    """
+    query = select(
+        Schedule.id, Schedule.user_id, User.name.label('user_name'), Schedule.date, Schedule.shift_type,
+        Schedule.start_time, Schedule.end_time, Schedule.hours
+    ).outerjoin(User, Schedule.user_id == User.id).where(
+        Schedule.date >= start,
+        Schedule.date <= end
+    ).order_by(Schedule.date, Schedule.start_time, Schedule.id)
+    if user_id is not None:
+        query = query.where(Schedule.user_id == user_id)
+    if after is not None:
+        query = query.where(tuple_(Schedule.date, Schedule.start_time, Schedule.id) > tuple_(*after))
+    return query
+
+def export_row(row):
+    return [row.id, row.user_id, row.user_name or 'Unknown', row.date.isoformat(), row.shift_type,
+            row.start_time, row.end_time, row.hours]
+
+@app.route('/api/schedules/export')
+def export_schedules():
+    """
+    Export schedules between `start` and `end` (ISO dates, inclusive).
+    
+    format=json (default) returns one page of `limit` rows and a
+    `next_cursor` to pass back as `cursor`; format=ndjson or csv streams
+    every row in the range from a server-side cursor, in batches of
+    EXPORT_STREAM_BATCH, so memory stays flat however long the range is.
+    `user_id` limits the export to one employee.
+    """
+    try:
+        start = date.fromisoformat(request.args.get('start', ''))
+        end = date.fromisoformat(request.args.get('end', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'start and end must be ISO dates (YYYY-MM-DD)'}), 400
+    if end < start:
+        return jsonify({'success': False, 'message': 'end must not be before start'}), 400
+    
+    export_format = request.args.get('format', 'json')
+    user_id = request.args.get('user_id', type=int)
+    
+    if export_format in ('ndjson', 'csv'):
+        batch = app.config['EXPORT_STREAM_BATCH']
+        
+        def stream():
+            result = db.session.execute(export_query(start, end, user_id).execution_options(yield_per=batch))
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(SCHEDULE_ROW_COLUMNS)
+                for rows in result.partitions():
+                    writer.writerows(export_row(row) for row in rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                yield buffer.getvalue()
+            else:
+                for rows in result.partitions():
+                    yield ''.join(
+                        json.dumps(dict(zip(SCHEDULE_ROW_COLUMNS, export_row(row)))) + '\n' for row in rows
+                    )
+        
+        mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+        filename = f'schedules_{start.isoformat()}_{end.isoformat()}.{export_format}'
+        return Response(stream_with_context(stream()), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        })
+    
+    if export_format != 'json':
+        return jsonify({'success': False, 'message': 'format must be json, ndjson or csv'}), 400
     
+    limit = request.args.get('limit', app.config['EXPORT_PAGE_SIZE'], type=int)
+    limit = min(max(limit, 1), app.config['EXPORT_MAX_PAGE_SIZE'])
+    try:
+        after = decode_export_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # One extra row tells whether another page follows
+    rows = db.session.execute(export_query(start, end, user_id, after).limit(limit + 1)).all()
+    next_cursor = encode_export_cursor(rows[limit - 1]) if len(rows) > limit else None
     return jsonify({
-        'schedules': [schedule.to_dict() for schedule in schedules],
-        'week_start': week_start.isoformat(),
-        'week_end': week_end.isoformat()
+        'columns': SCHEDULE_ROW_COLUMNS,
+        'rows': [export_row(row) for row in rows[:limit]],
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/schedules/generate', methods=['POST'])
 def generate_schedule():
-    """Generate optimized schedule for a week"""
+    """Generate optimized schedule for a week
+    
+    By default the solve runs as a background job and the response carries
+    a job id to poll; pass `"async": false` to solve inside the request.
+    """
     data = request.get_json()
     week_offset = data.get('week', 0)
     week_start, week_end = get_week_dates(week_offset)
@@ -449,34 +3164,155 @@ def generate_schedule():
     if not employees:
         return jsonify({'success': False, 'message': 'No employees found'}), 400
     
-    # Clear existing schedules for this week
-    Schedule.query.filter(
-        Schedule.date >= week_start,
-        Schedule.date <= week_end
-    ).delete()
+    constraints = data.get('constraints')
+    templates = load_shift_templates()
+    try:
+        week_end = week_start + timedelta(weeks=get_horizon_weeks(constraints), days=-1)
+        get_shift_definitions(constraints, templates)
+        get_objective_weights(constraints)
+        get_solver_mode(constraints)
+        get_solver_parameters(constraints)
+        hints = load_schedule_hints(week_start, constraints)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    demand = load_staffing_demand()
+    cache_key = schedule_fingerprint(employees, week_start, constraints, hints, demand, templates)
+    cached = schedule_cache.get(cache_key)
+    if cached:
+        save_generated_schedules(week_start, week_end, cached['schedules'])
+        return jsonify({
+            'success': True,
+            'cached': True,
+            'message': f"Generated {len(cached['schedules'])} shifts for week starting {week_start.isoformat()} (cached)",
+            'solver': cached['solver']
+        })
+    
+    if data.get('async', app.config['SCHEDULE_JOBS_ASYNC']):
+        job_id = submit_schedule_job(employees, week_start, week_end, constraints, cache_key, hints, demand, templates)
+        return jsonify({
+            'success': True,
+            'cached': False,
+            'job_id': job_id,
+            'status_url': f'/api/schedules/jobs/{job_id}',
+            'message': f'Schedule generation queued for week starting {week_start.isoformat()}'
+        }), 202
     
     # Generate new schedules
-    generated_schedules = generate_shifts(employees, week_start, data.get('constraints'))
-    
-    # Save to database
-    for schedule_data in generated_schedules:
-        schedule = Schedule(
-            user_id=schedule_data['user_id'],
-            date=schedule_data['date'],
-            shift_type=schedule_data['shift_type'],
-            start_time=schedule_data['start_time'],
-            end_time=schedule_data['end_time'],
-            hours=schedule_data['hours']
-        )
-        db.session.add(schedule)
+    solve_info = {}
+    executor = get_job_executor()[0] if len(partition_employees(employees, constraints)) > 1 else None
+    generated_schedules = generate_shifts(
+        employees, week_start, constraints, solve_info, hints=hints, demand=demand, templates=templates,
+        executor=executor
+    )
+    if solve_info.get('diagnostics'):
+        return jsonify({
+            'success': False,
+            'message': 'Schedule is infeasible: ' + '; '.join(d['message'] for d in solve_info['diagnostics']),
+            'diagnostics': solve_info['diagnostics'],
+            'solver': solve_info
+        }), 422
     
-    db.session.commit()
+    cache_schedule_result(cache_key, [emp.id for emp in employees], generated_schedules, solve_info)
+    save_generated_schedules(week_start, week_end, generated_schedules)
     
     return jsonify({
         'success': True,
-        'message': f'Generated {len(generated_schedules)} shifts for week starting {week_start.isoformat()}'
+        'cached': False,
+        'message': f'Generated {len(generated_schedules)} shifts for week starting {week_start.isoformat()}',
+        'solver': solve_info
+    })
+
+@app.route('/api/schedules/events')
+def schedule_event_stream():
+    """
+    Server-sent events for one week: a `ready` event, then one event per
+    committed change (schedules_generated, schedules_repaired,
+    schedule_updated, schedule_deleted) and comment heartbeats in between.
+    Once EVENT_MAX_STREAMS streams are open, new ones get a `busy` event and
+    close with a long retry: EventSource gives up for good on a non-200.
+    """
+    week_start, _ = get_week_dates(request.args.get('week', 0, type=int))
+    heartbeat = app.config['EVENT_HEARTBEAT_SECONDS']
+    
+    def stream():
+        # Subscribe only once the response is iterated, so an unsent response can't leak a queue
+        subscriber = schedule_events.subscribe(week_start)
+        if subscriber is None:
+            yield 'retry: 30000\nevent: busy\ndata: {}\n\n'
+            return
+        try:
+            ready = {'week_start': week_start.isoformat(), 'version': resource_versions['schedules']}
+            yield f"retry: 5000\nevent: ready\ndata: {json.dumps(ready)}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            schedule_events.unsubscribe(week_start, subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
+@app.route('/api/schedules/jobs/<job_id>')
+def get_schedule_job(job_id):
+    """Get the status and latest intermediate solution of a generation job"""
+    job = schedule_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify(schedule_job_to_dict(job))
+
+@app.route('/api/schedules/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_schedule_job(job_id):
+    """Cancel a queued or running generation job"""
+    job = schedule_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    if job['future'].done():
+        return jsonify({'success': False, 'message': f"Job already {job['status']}"}), 409
+    
+    job['cancel_event'].set()
+    for partition_future in job['partition_futures'].values():
+        partition_future.cancel()
+    job['future'].cancel()
+    
+    return jsonify({'success': True, 'job': schedule_job_to_dict(job)})
+
+@app.route('/api/schedules/repair', methods=['POST'])
+def repair_schedules():
+    """Fill a published week's open slots, keeping every unaffected assignment"""
+    data = request.get_json() or {}
+    week = data.get('week', 0) if isinstance(data, dict) else None
+    constraints = data.get('constraints') if isinstance(data, dict) else None
+    if isinstance(week, bool) or not isinstance(week, int):
+        return jsonify({'success': False, 'message': 'week must be an integer'}), 400
+    if constraints is not None and not isinstance(constraints, dict):
+        return jsonify({'success': False, 'message': 'constraints must be an object'}), 400
+    week_start, _ = get_week_dates(week)
+    
+    try:
+        get_shift_definitions(constraints, load_shift_templates())
+        get_objective_weights(constraints)
+        get_solver_parameters(constraints)
+        result = repair_week(week_start, constraints)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    solver = result['solver']
+    return jsonify(dict(
+        result,
+        success=True,
+        message=f"Filled {solver['open_positions'] - solver['unfilled_positions']} of "
+                f"{solver['open_positions']} open positions for week starting {week_start.isoformat()}"
+    ))
+
 @app.route('/api/schedules/<int:schedule_id>', methods=['PUT'])
 def update_schedule(schedule_id):
     """Update a specific schedule"""
@@ -489,6 +3325,8 @@ def update_schedule(schedule_id):
     schedule.hours = calculate_shift_hours(schedule.start_time, schedule.end_time)
     
     db.session.commit()
+    bump_version('schedules')
+    publish_schedule_change('schedule_updated', schedule.date, schedule=schedule.to_dict())
     
     return jsonify({'success': True, 'schedule': schedule.to_dict()})
 
@@ -498,9 +3336,155 @@ def delete_schedule(schedule_id):
     schedule = Schedule.query.get_or_404(schedule_id)
     db.session.delete(schedule)
     db.session.commit()
+    bump_version('schedules')
+    publish_schedule_change('schedule_deleted', schedule.date, schedule_id=schedule_id)
+    
+    return jsonify({'success': True})
+
+@app.route('/api/shift-templates')
+def get_shift_templates():
+    """Get all shift templates"""
+    templates = ShiftTemplate.query.order_by(ShiftTemplate.start_time, ShiftTemplate.name).all()
+    return jsonify([template.to_dict() for template in templates])
+
+def apply_shift_template(template, data):
+    """Validate and copy name/start_time/end_time from request data"""
+    name = str(data.get('name', template.name) or '').strip()
+    if not name or len(name) > 20:
+        raise ValueError('Template name must be 1-20 characters')
+    start_time = parse_shift_time(data.get('start_time', template.start_time))
+    end_time = parse_shift_time(data.get('end_time', template.end_time))
+    if start_time == end_time:
+        raise ValueError('Start and end time must differ')
+    
+    existing = ShiftTemplate.query.filter_by(name=name).first()
+    if existing and existing.id != template.id:
+        raise ValueError('Template name already exists')
+    template.name, template.start_time, template.end_time = name, start_time, end_time
+
+@app.route('/api/shift-templates', methods=['POST'])
+def add_shift_template():
+    """Add a shift template"""
+    template = ShiftTemplate()
+    try:
+        apply_shift_template(template, request.get_json())
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    db.session.add(template)
+    db.session.commit()
+    invalidate_reference('shift_templates')
+    
+    return jsonify({'success': True, 'template': template.to_dict()})
+
+@app.route('/api/shift-templates/<int:template_id>', methods=['PUT'])
+def update_shift_template(template_id):
+    """Update a shift template"""
+    template = ShiftTemplate.query.get_or_404(template_id)
+    old_name = template.name
+    try:
+        apply_shift_template(template, request.get_json())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # A rename carries over to the schedules, demand, preferences and availability that use the name
+    renamed = template.name != old_name
+    if renamed:
+        for column in (Schedule.shift_type, StaffingDemand.shift_type, User.preferred_shift_type):
+            db.session.execute(
+                update(column.class_).where(column == old_name).values({column.key: template.name}),
+                execution_options={'synchronize_session': False}
+            )
+        names = [name for name in load_shift_templates() if name != old_name] + [template.name]
+        for user in User.query.filter(User.availability.contains(json.dumps(old_name))):
+            availability = {
+                day: [template.name if shift == old_name else shift for shift in shifts]
+                if isinstance(shifts, list) else shifts
+                for day, shifts in json.loads(user.availability).items()
+            }
+            user.availability = json.dumps(availability)
+            user.availability_mask = parse_availability(user.availability, names)
+    db.session.commit()
+    invalidate_reference('shift_templates')
+    if renamed:
+        invalidate_reference('staffing_demand')
+        schedule_cache.clear()
+        bump_version('employees', 'schedules')
+    
+    return jsonify({'success': True, 'template': template.to_dict()})
+
+@app.route('/api/shift-templates/<int:template_id>', methods=['DELETE'])
+def delete_shift_template(template_id):
+    """Delete a shift template"""
+    template = ShiftTemplate.query.get_or_404(template_id)
+    in_use = [
+        label for label, column in (
+            ('schedules', Schedule.shift_type), ('staffing demand', StaffingDemand.shift_type),
+            ('employee preferences', User.preferred_shift_type)
+        )
+        if db.session.execute(select(column).where(column == template.name).limit(1)).first()
+    ]
+    if any(
+        template.name in shifts
+        for availability, in db.session.execute(
+            select(User.availability).where(User.availability.contains(json.dumps(template.name)))
+        )
+        for shifts in json.loads(availability).values() if isinstance(shifts, list)
+    ):
+        in_use.append('employee availability')
+    if in_use:
+        return jsonify({
+            'success': False,
+            'message': f"Template '{template.name}' is still used by {', '.join(in_use)}"
+        }), 409
+    
+    db.session.delete(template)
+    db.session.commit()
+    invalidate_reference('shift_templates')
     
     return jsonify({'success': True})
 
+@app.route('/api/demand')
+def get_staffing_demand():
+    """Get the staffing demand table"""
+    rows = StaffingDemand.query.order_by(
+        StaffingDemand.date, StaffingDemand.day_of_week, StaffingDemand.shift_type
+    ).all()
+    return jsonify([row.to_dict() for row in rows])
+
+@app.route('/api/demand/import', methods=['POST'])
+def import_demand():
+    """Bulk import staffing demand
+    
+    Accepts CSV (an uploaded `file` or a text/csv body) with the columns
+    day, shift_type, min_staff, max_staff, or JSON {"rows": [...]}. Existing
+    rows for the same day and shift are replaced; `replace=true` replaces
+    the whole table.
+    """
+    if 'file' in request.files:
+        rows = list(csv.DictReader(io.StringIO(request.files['file'].read().decode('utf-8-sig'))))
+        replace = request.form.get('replace', request.args.get('replace', 'false')).lower() == 'true'
+    elif request.is_json:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'message': 'Expected a JSON object with a rows list'}), 400
+        rows = data.get('rows', [])
+        replace = bool(data.get('replace', False))
+    else:
+        rows = list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+        replace = request.args.get('replace', 'false').lower() == 'true'
+    
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return jsonify({'success': False, 'message': 'Each demand row must be an object'}), 400
+    
+    try:
+        imported = import_staffing_demand(parse_demand_rows(rows, list(load_shift_templates())), replace)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid demand: {e}'}), 400
+    
+    return jsonify({'success': True, 'imported': imported, 'message': f'Imported {imported} demand rows'})
+
 if __name__ == '__main__':
     # Create instance directory if it doesn't exist
     os.makedirs('instance', exist_ok=True)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark persisting generated schedules.
+Compares the per-row ORM path with save_generated_schedules' bulk insert.
+
+Usage: python benchmarks/bulk_insert.py [row counts...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add the project root to Python path and point the app at a scratch database
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['FLASK_ENV'] = 'production'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from app import app, db, Schedule, DEFAULT_SHIFT_DEFINITIONS, save_generated_schedules
+
+WEEK_START = date(2025, 1, 6)
+
+def make_entries(count):
+    shifts = list(DEFAULT_SHIFT_DEFINITIONS)
+    entries = []
+    for i in range(count):
+        shift = shifts[i % len(shifts)]
+        entries.append({
+            'user_id': i // 21 + 1,
+            'date': WEEK_START + timedelta(days=(i // len(shifts)) % 7),
+            'shift_type': shift,
+            'start_time': DEFAULT_SHIFT_DEFINITIONS[shift]['start'],
+            'end_time': DEFAULT_SHIFT_DEFINITIONS[shift]['end'],
+            'hours': 8.0
+        })
+    return entries
+
+def save_with_orm(week_start, week_end, entries):
+    """The original persistence path: one ORM object per shift"""
+    Schedule.query.filter(Schedule.date >= week_start, Schedule.date <= week_end).delete()
+    for entry in entries:
+        db.session.add(Schedule(**{key: entry[key] for key in
+                                   ('user_id', 'date', 'shift_type', 'start_time', 'end_time', 'hours')}))
+    db.session.commit()
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    week_end = WEEK_START + timedelta(days=6)
+    
+    with app.app_context():
+        db.create_all()
+        print(f"{'rows':>8} {'orm rows/s':>12} {'bulk rows/s':>12} {'speedup':>8}")
+        for count in counts:
+            entries = make_entries(count)
+            orm = timed(save_with_orm, WEEK_START, week_end, entries)
+            bulk = timed(save_generated_schedules, WEEK_START, week_end, entries)
+            assert Schedule.query.count() == count
+            print(f"{count:>8} {count / orm:>12,.0f} {count / bulk:>12,.0f} {orm / bulk:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Regression suite for generate_shifts over synthetic rosters (see rosters.py).
+
+Every size is solved in each mode:
+  cp_sat     the default CP-SAT solve, hinted by the greedy heuristic
+  heuristic  the greedy schedule alone (constraints.mode = 'heuristic')
+  fallback   CP-SAT starved of time and hints, so large rosters fall back
+             to the heuristic schedule; `fallback` records whether it did
+
+Each run happens in a fresh process so its peak RSS is its own. Model build
+time, solve time, peak memory and solution quality (status, objective,
+bound, slots and positions short of the staffing demand, employees over
+their hour cap) are written to JSON.
+With --baseline, timings and objectives are compared to an earlier run.
+
+Usage: python benchmarks/generate_suite.py [--sizes 10 100 ...] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+WEEK_START = date(2025, 1, 6)
+SIZES = [10, 50, 200, 1000, 5000]
+MODES = {
+    'cp_sat': {},
+    'heuristic': {'mode': 'heuristic'},
+    'fallback': {'time_limit_seconds': 0.1, 'heuristic_hint': False}
+}
+
+def check_schedule(employees, schedules, week_demand, shifts):
+    """
+    (date, shift) slots below their minimum demand, the positions they are
+    short by, and employees over their hour cap
+    """
+    staffed = Counter((s['date'], s['shift_type']) for s in schedules)
+    shortfalls = [
+        max(0, low - staffed[WEEK_START + timedelta(days=day_idx), shift])
+        for day_idx, day in enumerate(week_demand)
+        for shift, (low, _) in zip(shifts, day)
+    ]
+    hours = Counter()
+    for s in schedules:
+        hours[s['user_id']] += s['hours']
+    caps = {emp.id: emp.max_hours_per_week or 40 for emp in employees}
+    return {
+        'uncovered_slots': sum(short > 0 for short in shortfalls),
+        'short_positions': sum(shortfalls),
+        'over_hours': sum(hours[user_id] > cap for user_id, cap in caps.items())
+    }
+
+def run_case(size, mode, seed, time_limit):
+    """Solve one (size, mode) case; runs in its own process"""
+    from app import demand_for_days, generate_shifts, get_shift_definitions
+    from rosters import make_roster
+    
+    employees = make_roster(size, seed)
+    shifts = get_shift_definitions()[1]
+    constraints = dict({'time_limit_seconds': time_limit}, **MODES[mode])
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    solve_info = {}
+    start = time.perf_counter()
+    schedules = generate_shifts(employees, WEEK_START, constraints, solve_info)
+    total = time.perf_counter() - start
+    
+    # A fallback returns the heuristic schedule, so report its objective
+    heuristic = solve_info.get('heuristic', {})
+    objective = solve_info.get('objective_value')
+    bound = solve_info.get('best_objective_bound')
+    if solve_info.get('fallback'):
+        objective, bound = heuristic.get('objective_value'), None
+    return dict({
+        'employees': size,
+        'mode': mode,
+        'status': solve_info.get('status'),
+        'fallback': solve_info.get('fallback'),
+        'build_time': solve_info.get('build_time'),
+        'solve_time': solve_info.get('wall_time'),
+        'total_time': total,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'import_rss_mb': rss_before / 1024,
+        'variables': solve_info.get('variables'),
+        'shifts': len(schedules),
+        'objective_value': objective,
+        'best_objective_bound': bound,
+        'gap': (objective - bound) / max(abs(objective), 1) if objective is not None and bound is not None else None,
+        'objective_terms': solve_info.get('objective_terms'),
+        'heuristic_objective': heuristic.get('objective_value'),
+        'diagnostics': [d['message'] for d in solve_info.get('diagnostics', [])]
+    }, **check_schedule(employees, schedules, demand_for_days(None, WEEK_START, 7, shifts), shifts))
+
+def compare(results, baseline_path):
+    """Print time and objective changes against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r['employees'], r['mode']): r for r in json.load(f)['results']}
+    
+    print(f"\n{'employees':>10} {'mode':>10} {'time':>9} {'objective':>10}")
+    for result in results:
+        old = baseline.get((result['employees'], result['mode']))
+        if old is None:
+            continue
+        time_change = result['total_time'] / old['total_time'] - 1 if old['total_time'] else 0
+        if old['objective_value'] and result['objective_value'] is not None:
+            objective_change = f"{result['objective_value'] / old['objective_value'] - 1:>+9.1%}"
+        else:
+            objective_change = f"{'-':>9}"
+        print(f"{result['employees']:>10} {result['mode']:>10} {time_change:>+8.1%} {objective_change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=10.0, help='CP-SAT limit for the cp_sat mode')
+    parser.add_argument('--output', default='generate_suite.json', help='ignored by git')
+    parser.add_argument('--baseline', help='earlier --output file to compare against')
+    args = parser.parse_args()
+    
+    results = []
+    context = multiprocessing.get_context('spawn')
+    print(f"{'employees':>10} {'mode':>10} {'status':>10} {'build (s)':>10} {'solve (s)':>10} "
+          f"{'rss (MB)':>9} {'objective':>10} {'uncovered':>10}")
+    for size in args.sizes:
+        for mode in args.modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, size, mode, args.seed, args.time_limit).result()
+            results.append(result)
+            print(f"{size:>10} {mode:>10} {result['status'] or '-':>10} {result['build_time'] or 0:>10.3f} "
+                  f"{result['solve_time'] or 0:>10.3f} {result['peak_rss_mb']:>9.1f} "
+                  f"{result['objective_value'] if result['objective_value'] is not None else '-':>10} "
+                  f"{result['uncovered_slots']:>10}")
+    
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'time_limit_seconds': args.time_limit,
+            'results': results
+        }, f, indent=2)
+    print(f'\nWrote {len(results)} results to {args.output}')
+    
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the main API endpoints, for sizing gunicorn workers.
+Seeds a scratch SQLite database with a synthetic roster (see rosters.py),
+staffing demand and several weeks of schedules, serves app.py from a
+threaded in-process server and drives it with concurrent keep-alive
+clients, one endpoint at a time:
+
+  login      POST /api/login
+  employees  GET  /api/employees
+  schedules  GET  /api/schedules?week=N
+  generate   POST /api/schedules/generate (synchronous, heuristic by default)
+
+Generate requests get a random preference weight each, so they miss the
+schedule result cache and measure solving; --generate-cache sends the same
+constraints every time to measure cache hits instead. Reports p50/p95/p99
+latency, throughput, errors and (for generate) cache hits per endpoint.
+
+Usage: python benchmarks/http_load.py [--employees 1000] [--clients 8] [--seconds 10] [--output results.json]
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+# Add the project root to Python path and point the app at a scratch database
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['FLASK_ENV'] = 'production'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+from app import (
+    app, db, User, generate_shifts, get_week_dates, import_staffing_demand, parse_demand_rows,
+    save_generated_schedules, seed_shift_templates, DAYS, STANDARD_SHIFTS
+)
+from rosters import make_roster
+
+PASSWORD = 'password123'
+ENDPOINTS = ('login', 'employees', 'schedules', 'generate')
+
+def seed(count, weeks, staff_per_shift):
+    """Roster, demand and `weeks` weeks of schedules starting at the current week"""
+    roster = make_roster(count)
+    password_hash = generate_password_hash(PASSWORD)
+    with app.app_context():
+        db.create_all()
+        seed_shift_templates()
+        db.session.execute(User.__table__.insert(), [
+            {
+                'id': emp.id, 'username': f'user{emp.id}', 'name': emp.name, 'email': f'user{emp.id}@example.com',
+                'password_hash': password_hash, 'role': 'employee', 'max_hours_per_week': emp.max_hours_per_week,
+                'can_work_weekends': emp.can_work_weekends, 'preferred_shift_type': emp.preferred_shift_type,
+                'availability': emp.availability, 'availability_mask': emp.availability_mask
+            }
+            for emp in roster
+        ])
+        db.session.commit()
+        
+        rows = [{'day': day, 'shift_type': shift, 'min_staff': staff_per_shift} for day in DAYS for shift in STANDARD_SHIFTS]
+        import_staffing_demand(parse_demand_rows(rows, STANDARD_SHIFTS))
+        demand = {day: {shift: [staff_per_shift, None] for shift in STANDARD_SHIFTS} for day in DAYS}
+        
+        week_start, _ = get_week_dates(0)
+        total = 0
+        for week in range(weeks):
+            start = week_start + timedelta(weeks=week)
+            schedules = generate_shifts(roster, start, {'mode': 'heuristic'}, demand=demand)
+            total += save_generated_schedules(start, start + timedelta(days=6), schedules)
+    return total
+
+def build_request(endpoint, rng, args, generate_constraints):
+    """(method, path, JSON body) for one request to `endpoint`"""
+    if endpoint == 'login':
+        return 'POST', '/api/login', {'username': f'user{rng.randint(1, args.employees)}', 'password': PASSWORD}
+    if endpoint == 'employees':
+        return 'GET', '/api/employees', None
+    if endpoint == 'schedules':
+        return 'GET', f'/api/schedules?week={rng.randrange(args.weeks)}', None
+    
+    constraints = dict(generate_constraints)
+    if not args.generate_cache:
+        # A new fingerprint per request, so every generate solves
+        constraints['objective_weights'] = {'preference': round(rng.uniform(1, 3), 6)}
+    return 'POST', '/api/schedules/generate', {
+        'week': rng.randrange(args.weeks), 'async': False, 'constraints': constraints
+    }
+
+def client(port, endpoint, seconds, seed_value, args, generate_constraints, latencies, errors, hits):
+    """One keep-alive client issuing requests back to back until the deadline"""
+    rng = random.Random(seed_value)
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        method, path, body = build_request(endpoint, rng, args, generate_constraints)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            data = response.read()
+            ok = response.status < 400
+            if ok and endpoint == 'generate' and json.loads(data).get('cached'):
+                hits.append(path)
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(path)
+    connection.close()
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))]
+
+def run_endpoint(port, endpoint, args, generate_constraints):
+    latencies = []
+    errors = []
+    hits = []
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(port, endpoint, args.seconds, args.seed * 1000 + i, args, generate_constraints, latencies, errors, hits)
+        )
+        for i in range(args.clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        'endpoint': endpoint,
+        'clients': args.clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'cache_hits': len(hits),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000 if latencies else None,
+        'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--weeks', type=int, default=8, help='weeks of seeded schedules')
+    parser.add_argument('--staff-per-shift', type=int, default=None, help='default: employees / 25')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10, help='duration per endpoint')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('--generate-mode', choices=('heuristic', 'cp_sat'), default='heuristic')
+    parser.add_argument('--generate-cache', action='store_true',
+                        help='repeat the same generate constraints so requests hit the result cache')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON')
+    args = parser.parse_args()
+    staff_per_shift = args.staff_per_shift or max(1, args.employees // 25)
+    generate_constraints = {'mode': args.generate_mode, 'time_limit_seconds': 5}
+    
+    seed_start = time.perf_counter()
+    shifts = seed(args.employees, args.weeks, staff_per_shift)
+    print(f"Seeded {args.employees} employees and {shifts} shifts over {args.weeks} weeks "
+          f"in {time.perf_counter() - seed_start:.1f}s")
+    
+    # Per-request access logs would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    results = []
+    print(f"{'endpoint':>10} {'requests':>9} {'errors':>7} {'cached':>7} {'req/s':>8} "
+          f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    try:
+        for endpoint in args.endpoints:
+            result = run_endpoint(server.server_port, endpoint, args, generate_constraints)
+            results.append(result)
+            print(f"{endpoint:>10} {result['requests']:>9} {result['errors']:>7} {result['cache_hits']:>7} "
+                  f"{result['throughput']:>8.1f} "
+                  f"{result['p50_ms'] or 0:>9.1f} {result['p95_ms'] or 0:>9.1f} {result['p99_ms'] or 0:>9.1f}")
+    finally:
+        server.shutdown()
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'employees': args.employees,
+                'weeks': args.weeks,
+                'shifts': shifts,
+                'clients': args.clients,
+                'seconds': args.seconds,
+                'generate_constraints': generate_constraints,
+                'generate_cache': args.generate_cache,
+                'cpus': os.cpu_count(),
+                'results': results
+            }, f, indent=2)
+        print(f'Wrote results to {args.output}')
+
+if __name__ == '__main__':
+    main()
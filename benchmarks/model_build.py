@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark CP-SAT model construction for generate_shifts.
+Compares the flat ShiftModel builder against the original nested-dict builder.
+
+Usage: python benchmarks/model_build.py [sizes...]
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from ortools.sat.python import cp_model
+from app import (
+    EmployeeSnapshot, DEFAULT_SHIFT_DEFINITIONS, build_shift_model, calculate_shift_hours
+)
+
+SHIFTS = ['opening', 'midday', 'closing']
+
+def make_employees(count):
+    """Synthetic roster with mixed hour caps and weekend flags"""
+    return [
+        EmployeeSnapshot(
+            id=i + 1,
+            name=f'Employee {i + 1}',
+            max_hours_per_week=(24, 32, 40)[i % 3],
+            can_work_weekends=i % 4 != 0,
+            preferred_shift_type='any',
+            availability=None,
+            availability_mask=None
+        )
+        for i in range(count)
+    ]
+
+def build_nested_model(employees, shift_definitions):
+    """The original dict-of-dict builder, kept here as the baseline"""
+    model = cp_model.CpModel()
+    employee_shift = {}
+    for emp in employees:
+        employee_shift[emp.id] = {}
+        for day_idx in range(7):
+            employee_shift[emp.id][day_idx] = {}
+            for shift in SHIFTS:
+                employee_shift[emp.id][day_idx][shift] = model.NewBoolVar(
+                    f'emp_{emp.id}_day_{day_idx}_shift_{shift}'
+                )
+    
+    for day_idx in range(7):
+        for shift in SHIFTS:
+            model.Add(sum(employee_shift[emp.id][day_idx][shift] for emp in employees) >= 1)
+    
+    for emp in employees:
+        weekly_hours = []
+        for day_idx in range(7):
+            for shift in SHIFTS:
+                shift_hours = calculate_shift_hours(
+                    shift_definitions[shift]['start'], shift_definitions[shift]['end']
+                )
+                weekly_hours.append(employee_shift[emp.id][day_idx][shift] * int(shift_hours))
+        model.Add(sum(weekly_hours) <= (emp.max_hours_per_week or 40))
+    
+    for emp in employees:
+        for day_idx in range(7):
+            model.Add(employee_shift[emp.id][day_idx]['opening'] + employee_shift[emp.id][day_idx]['midday'] <= 1)
+            model.Add(employee_shift[emp.id][day_idx]['midday'] + employee_shift[emp.id][day_idx]['closing'] <= 1)
+    
+    for emp in employees:
+        if not emp.can_work_weekends:
+            for shift in SHIFTS:
+                model.Add(employee_shift[emp.id][5][shift] == 0)
+                model.Add(employee_shift[emp.id][6][shift] == 0)
+    
+    return model
+
+def best_of(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 500, 1000, 2000]
+    
+    print(f"{'employees':>10} {'nested (ms)':>12} {'flat (ms)':>10} {'speedup':>8}")
+    for size in sizes:
+        employees = make_employees(size)
+        nested = best_of(lambda: build_nested_model(employees, DEFAULT_SHIFT_DEFINITIONS))
+        flat = best_of(lambda: build_shift_model(employees, DEFAULT_SHIFT_DEFINITIONS, SHIFTS))
+        print(f"{size:>10} {nested * 1000:>12.1f} {flat * 1000:>10.1f} {nested / flat:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
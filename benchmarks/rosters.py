@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Synthetic rosters for the scheduling benchmarks.
+Employees get a seeded mix of hour caps, weekend flags, preferred shifts
+and weekly availability, so every run at a given size and seed solves the
+same problem.
+
+Usage: python benchmarks/rosters.py [count] [seed]
+"""
+
+import json
+import os
+import random
+import sys
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app import DAYS, STANDARD_SHIFTS, EmployeeSnapshot, parse_availability
+
+HOUR_CAPS = (16, 24, 32, 40, 40)
+PREFERENCES = ('any', 'any', 'opening', 'midday', 'closing')
+
+def make_availability(rng):
+    """
+    Weekly availability JSON, or None (always available) for a third of the
+    roster. Everyone else has two days off and drops a few more shifts.
+    """
+    if rng.random() < 1 / 3:
+        return None
+    days_off = set(rng.sample(DAYS, 2))
+    return json.dumps({
+        day: [] if day in days_off else [shift for shift in STANDARD_SHIFTS if rng.random() < 0.8]
+        for day in DAYS
+    })
+
+def make_roster(count, seed=0):
+    """`count` EmployeeSnapshots with varied caps, weekends, preferences and availability"""
+    rng = random.Random(seed)
+    roster = []
+    for i in range(count):
+        availability = make_availability(rng)
+        roster.append(EmployeeSnapshot(
+            id=i + 1,
+            name=f'Employee {i + 1}',
+            max_hours_per_week=rng.choice(HOUR_CAPS),
+            can_work_weekends=rng.random() < 0.75,
+            preferred_shift_type=rng.choice(PREFERENCES),
+            availability=availability,
+            availability_mask=parse_availability(availability)
+        ))
+    return roster
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    for emp in make_roster(count, seed):
+        print(json.dumps(emp._asdict()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark schedule queries on a large SQLite history with and without the
+schedules indexes.
+
+Usage: python benchmarks/schedule_indexes.py [rows]   (default 1,000,000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add the project root to Python path and point the app at a scratch database
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['FLASK_ENV'] = 'production'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from sqlalchemy import insert, text
+from app import app, db, Schedule, DEFAULT_SHIFT_DEFINITIONS
+
+EMPLOYEES = 500
+FIRST_DAY = date(2015, 1, 5)
+
+def seed(rows):
+    shifts = list(DEFAULT_SHIFT_DEFINITIONS)
+    batch = []
+    for i in range(rows):
+        shift = shifts[i % 3]
+        batch.append({
+            'user_id': i % EMPLOYEES + 1,
+            'date': FIRST_DAY + timedelta(days=i // (EMPLOYEES // 2)),
+            'shift_type': shift,
+            'start_time': DEFAULT_SHIFT_DEFINITIONS[shift]['start'],
+            'end_time': DEFAULT_SHIFT_DEFINITIONS[shift]['end'],
+            'hours': 8.0
+        })
+        if len(batch) == 50000:
+            db.session.execute(insert(Schedule.__table__), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(Schedule.__table__), batch)
+    db.session.commit()
+    return FIRST_DAY + timedelta(days=(rows - 1) // (EMPLOYEES // 2))
+
+def best_of(fn, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def queries(last_day):
+    week_start = last_day - timedelta(days=last_day.weekday() + 7)
+    week_end = week_start + timedelta(days=6)
+    return {
+        'week listing': lambda: Schedule.query.filter(
+            Schedule.date >= week_start, Schedule.date <= week_end
+        ).order_by(Schedule.date, Schedule.start_time).all(),
+        'employee week': lambda: Schedule.query.filter(
+            Schedule.user_id == 42, Schedule.date >= week_start, Schedule.date <= week_end
+        ).all(),
+        'employee history': lambda: Schedule.query.filter(Schedule.user_id == 42).count(),
+    }
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        last_day = seed(rows)
+        print(f"Seeded {rows:,} rows in {time.perf_counter() - start:.1f}s")
+        
+        with_indexes = {name: best_of(fn) for name, fn in queries(last_day).items()}
+        
+        for index in Schedule.__table__.indexes:
+            index.drop(db.engine)
+        db.session.execute(text('ANALYZE'))
+        without_indexes = {name: best_of(fn) for name, fn in queries(last_day).items()}
+        
+        print(f"{'query':<18} {'no index (ms)':>14} {'indexed (ms)':>13}")
+        for name in with_indexes:
+            print(f"{name:<18} {without_indexes[name] * 1000:>14.2f} {with_indexes[name] * 1000:>13.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Check and time the schedule listing endpoints.
+Fails if GET /api/schedules or /api/schedules/rows issues more than one
+SELECT for a populated week (the old lazy-loaded `user` caused N+1).
+
+Usage: python benchmarks/schedule_queries.py [employees]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to Python path and point the app at a scratch database
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['FLASK_ENV'] = 'production'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from sqlalchemy import event
+from app import app, db, User, get_week_dates, round_robin_schedules, save_generated_schedules, DEFAULT_SHIFT_DEFINITIONS
+
+def seed(count):
+    users = [
+        User(username=f'user{i}', name=f'User {i}', email=f'user{i}@example.com', password_hash='x', role='employee')
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    
+    week_start, week_end = get_week_dates(0)
+    schedules = []
+    for offset in range(0, count, 3):
+        rotated = users[offset:] + users[:offset]
+        schedules.extend(round_robin_schedules(rotated, week_start, DEFAULT_SHIFT_DEFINITIONS,
+                                               list(DEFAULT_SHIFT_DEFINITIONS)))
+    save_generated_schedules(week_start, week_end, schedules)
+    return len(schedules)
+
+def count_selects(client, url):
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    
+    assert response.status_code == 200, response.status_code
+    return len(statements), elapsed
+
+def main():
+    employees = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    
+    with app.app_context():
+        db.create_all()
+        shifts = seed(employees)
+        
+        client = app.test_client()
+        failed = False
+        print(f"{shifts} shifts in the current week")
+        for url in ('/api/schedules?week=0', '/api/schedules/rows?week=0'):
+            selects, elapsed = count_selects(client, url)
+            print(f"{url:<30} {selects:>3} SELECT(s) {elapsed * 1000:>8.1f} ms")
+            if selects > 1:
+                failed = True
+                print(f"  expected a single SELECT for {url}")
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write load test against a file-backed SQLite database.
+Several reader processes (like gunicorn workers) poll GET /api/schedules
+while a writer process keeps replacing the week via save_generated_schedules.
+Runs once with SQLite defaults and once with the configured SQLITE_PRAGMAS.
+
+Usage: python benchmarks/sqlite_concurrency.py [readers] [seconds]
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+EMPLOYEES = 200
+
+def week_entries(week_start):
+    """Generated-schedule dicts covering every shift of a week, three staff each"""
+    from app import DEFAULT_SHIFT_DEFINITIONS
+    entries = []
+    for day_idx in range(7):
+        for shift_idx, (shift, times) in enumerate(DEFAULT_SHIFT_DEFINITIONS.items()):
+            for slot in range(3):
+                entries.append({
+                    'user_id': (day_idx * 9 + shift_idx * 3 + slot) % EMPLOYEES + 1,
+                    'date': week_start + timedelta(days=day_idx),
+                    'shift_type': shift,
+                    'start_time': times['start'],
+                    'end_time': times['end'],
+                    'hours': 8.0
+                })
+    return entries
+
+def reader(duration, results):
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+    client = app.test_client()
+    ok = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        try:
+            response = client.get('/api/schedules?week=0')
+            if response.status_code == 200:
+                ok += 1
+            else:
+                errors += 1
+        except Exception:
+            errors += 1
+    results.put(('read', ok, errors))
+
+def writer(duration, results):
+    from app import app, db, get_week_dates, save_generated_schedules
+    week_start, week_end = get_week_dates(0)
+    entries = week_entries(week_start)
+    ok = errors = 0
+    with app.app_context():
+        db.engine.dispose(close=False)
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            try:
+                save_generated_schedules(week_start, week_end, entries)
+                ok += 1
+            except Exception:
+                errors += 1
+    results.put(('write', ok, errors))
+
+def run_mode(readers, duration):
+    """Run one load test in this process (mode chosen by the parent)"""
+    from app import app, db, User, get_week_dates, save_generated_schedules
+    
+    if os.environ.get('BENCH_SQLITE_DEFAULTS'):
+        app.config['SQLITE_PRAGMAS'] = {}
+    
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(id=i + 1, username=f'user{i}', name=f'User {i}', email=f'user{i}@example.com',
+                 password_hash='x', role='employee')
+            for i in range(EMPLOYEES)
+        ])
+        db.session.commit()
+        week_start, week_end = get_week_dates(0)
+        save_generated_schedules(week_start, week_end, week_entries(week_start))
+        db.engine.dispose()
+    
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(duration, results)) for _ in range(readers)]
+    processes.append(context.Process(target=writer, args=(duration, results)))
+    for process in processes:
+        process.start()
+    totals = {'read': [0, 0], 'write': [0, 0]}
+    for _ in processes:
+        kind, ok, errors = results.get()
+        totals[kind][0] += ok
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+    
+    for kind, (ok, errors) in totals.items():
+        print(f"  {kind:<6} {ok / duration:>9.1f}/s  errors: {errors}")
+
+def main():
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    
+    if os.environ.get('BENCH_SQLITE_CHILD'):
+        run_mode(readers, duration)
+        return
+    
+    for label, extra in (('SQLite defaults', {'BENCH_SQLITE_DEFAULTS': '1'}), ('SQLITE_PRAGMAS', {})):
+        env = dict(os.environ, BENCH_SQLITE_CHILD='1', FLASK_ENV='production',
+                   DATABASE_URL='sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'), **extra)
+        print(f"{label}: {readers} readers + 1 writer for {duration:.0f}s")
+        subprocess.run([sys.executable, os.path.abspath(__file__), str(readers), str(duration)], env=env, check=True)
+
+if __name__ == '__main__':
+    main()
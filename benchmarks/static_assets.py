@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark requests per second on the SPA shell (GET /).
+Compares the old handler, which re-read index.html from disk on every
+request, with the cached shell served plain, gzip-encoded and as a
+conditional 304.
+
+Usage: python benchmarks/static_assets.py [seconds]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to Python path and point the app at a scratch database
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ['FLASK_ENV'] = 'production'
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from app import app
+
+@app.route('/bench/disk-index')
+def disk_index():
+    """The original index route"""
+    with open(os.path.join(project_root, 'index.html'), 'r') as f:
+        return f.read()
+
+def requests_per_second(client, path, headers, seconds):
+    count = 0
+    size = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.get(path, headers=headers)
+        size = len(response.data)
+        count += 1
+    return count / seconds, size, response.status_code
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    client = app.test_client()
+    etag = client.get('/', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    
+    cases = [
+        ('disk read (old)', '/bench/disk-index', {}),
+        ('cached', '/', {}),
+        ('cached gzip', '/', {'Accept-Encoding': 'gzip'}),
+        ('cached br/gzip', '/', {'Accept-Encoding': 'br, gzip'}),
+        ('conditional 304', '/', {'Accept-Encoding': 'gzip', 'If-None-Match': etag}),
+    ]
+    print(f"{'case':>16} {'req/s':>9} {'status':>7} {'bytes':>7}")
+    for label, path, headers in cases:
+        rate, size, status = requests_per_second(client, path, headers, seconds)
+        print(f"{label:>16} {rate:>9.0f} {status:>7} {size:>7}")
+
+if __name__ == '__main__':
+    main()
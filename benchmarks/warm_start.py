@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark warm-starting generate_shifts from a previous roster.
+Solves a week cold, edits one employee, then re-solves cold and with hints.
+
+Usage: python benchmarks/warm_start.py [sizes...]
+"""
+
+import os
+import sys
+from datetime import date
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from app import generate_shifts
+from model_build import make_employees
+
+WEEK_START = date(2025, 1, 6)
+
+def to_hints(schedules):
+    return {(s['user_id'], (s['date'] - WEEK_START).days, s['shift_type']) for s in schedules}
+
+def solve(employees, constraints, hints=None):
+    solve_info = {}
+    schedules = generate_shifts(employees, WEEK_START, constraints, solve_info, hints=hints)
+    return schedules, solve_info
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 200, 500]
+    constraints = {'time_limit_seconds': 60}
+    
+    print(f"{'employees':>10} {'mode':>20} {'wall (s)':>9} {'changed':>8} {'status':>10}")
+    for size in sizes:
+        employees = make_employees(size)
+        baseline, _ = solve(employees, constraints)
+        previous = to_hints(baseline)
+        
+        # Single employee edit: the first employee drops to a 16 hour cap
+        edited = [employees[0]._replace(max_hours_per_week=16)] + employees[1:]
+        
+        runs = [
+            ('cold', constraints, None),
+            ('hinted', constraints, previous),
+            ('hinted+disruption', dict(constraints, minimal_disruption=True), previous),
+        ]
+        for mode, run_constraints, hints in runs:
+            schedules, info = solve(edited, run_constraints, hints)
+            changed = len(to_hints(schedules) ^ previous)
+            print(f"{size:>10} {mode:>20} {info['wall_time']:>9.3f} {changed:>8} {info['status']:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,76 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///scheduler.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool (per worker process)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_timeout': 30,
+        'pool_pre_ping': True
+    }
+    
+    # Applied to every new SQLite connection; WAL lets readers run alongside
+    # the schedule writer and busy_timeout waits out the remaining locks
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000
+    }
+    
+    # CP-SAT solver limits for schedule generation
+    SOLVER_TIME_LIMIT_SECONDS = float(os.environ.get('SOLVER_TIME_LIMIT_SECONDS', 30))
+    SOLVER_MAX_TIME_LIMIT_SECONDS = float(os.environ.get('SOLVER_MAX_TIME_LIMIT_SECONDS', 120))
+    SOLVER_NUM_WORKERS = int(os.environ.get('SOLVER_NUM_WORKERS', os.cpu_count() or 1))
+    SOLVER_RELATIVE_GAP = float(os.environ.get('SOLVER_RELATIVE_GAP', 0.0))
+    SOLVER_LINEARIZATION_LEVEL = int(os.environ.get('SOLVER_LINEARIZATION_LEVEL', 2))
+    
+    # Background generation jobs and result cache
+    SCHEDULE_JOBS_ASYNC = True
+    SCHEDULE_JOB_WORKERS = int(os.environ.get('SCHEDULE_JOB_WORKERS', 2))
+    SCHEDULE_JOB_HISTORY = 100
+    SCHEDULE_CACHE_SIZE = int(os.environ.get('SCHEDULE_CACHE_SIZE', 64))
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 64))
+    
+    # Schedule history export
+    EXPORT_PAGE_SIZE = 1000
+    EXPORT_MAX_PAGE_SIZE = 10000
+    EXPORT_STREAM_BATCH = 1000
+    
+    # Server-sent schedule events
+    EVENT_QUEUE_SIZE = 32
+    EVENT_HEARTBEAT_SECONDS = 15
+    EVENT_MAX_STREAMS = int(os.environ.get('EVENT_MAX_STREAMS', 8))
+    
+    # Bulk employee import: hashing pool size and the batch size that uses it
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    PASSWORD_HASH_POOL_THRESHOLD = 16
+    
+    # Keep the SPA shell and static assets in memory, precompressed
+    STATIC_ASSET_CACHE = True
+    
+    # Multi-week horizons; longer ones are solved week by week
+    SCHEDULE_MAX_HORIZON_WEEKS = 12
+    SCHEDULE_DECOMPOSE_WEEKS = 4
+    
+    # Incremental repair: solver budget and employees considered per open slot
+    SCHEDULE_REPAIR_TIME_LIMIT_SECONDS = float(os.environ.get('SCHEDULE_REPAIR_TIME_LIMIT_SECONDS', 1.0))
+    SCHEDULE_REPAIR_CANDIDATES = int(os.environ.get('SCHEDULE_REPAIR_CANDIDATES', 50))
+    
 class DevelopmentConfig(Config):
     DEBUG = True
     
 class ProductionConfig(Config):
     DEBUG = False
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True
+    }
+    SQLITE_PRAGMAS = dict(Config.SQLITE_PRAGMAS, busy_timeout=15000, mmap_size=256 * 1024 * 1024)
     
 class TestingConfig(Config):
     TESTING = True
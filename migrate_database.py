@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Upgrade an existing Shift Scheduler database in place.
+Adds columns and indexes declared after the database was first created.
+
+Usage: python migrate_database.py [path/to/scheduler.db]
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+def main():
+    database = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'instance', 'scheduler.db')
+    if not os.path.exists(database):
+        print(f"❌ Database not found: {database}")
+        return 1
+    
+    # Point the app at the requested file before it creates its engine
+    os.environ['FLASK_ENV'] = 'production'
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.abspath(database)
+    
+    from app import upgrade_db
+    created = upgrade_db()
+    
+    if created:
+        print(f"✅ Applied: {', '.join(created)}")
+    else:
+        print("✓ Database already up to date")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
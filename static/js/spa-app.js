@@ -1,12 +1,16 @@
 /**
  * Enhanced JavaScript for the SPA version of Shift Scheduler
  * This version connects to the Flask API for real data
+ *
+ * Not loaded by index.html yet, which still runs the inline static demo;
+ * include it through its content-hashed URL (asset_url) once it is wired up.
  */
 
 class ShiftSchedulerApp {
     constructor() {
         this.currentUser = null;
         this.currentPage = 'login';
+        this.scheduleEvents = null;
         this.init();
     }
 
@@ -65,6 +69,7 @@ class ShiftSchedulerApp {
     }
 
     logout() {
+        this.unsubscribeFromSchedules();
         this.currentUser = null;
         this.showPage('login');
         document.getElementById('navbar').classList.add('hidden');
@@ -83,6 +88,11 @@ class ShiftSchedulerApp {
             document.getElementById(page).classList.add('hidden');
         });
         
+        // Live schedule updates only while the schedules page is open
+        if (pageName !== 'schedules') {
+            this.unsubscribeFromSchedules();
+        }
+        
         // Show requested page
         if (pageName === 'login') {
             document.getElementById('login-page').classList.remove('hidden');
@@ -92,6 +102,7 @@ class ShiftSchedulerApp {
             // Load page-specific content
             if (pageName === 'schedules') {
                 this.loadSchedules();
+                this.subscribeToSchedules();
             } else if (pageName === 'employees') {
                 this.loadEmployees();
             }
@@ -131,6 +142,24 @@ class ShiftSchedulerApp {
         }
     }
 
+    subscribeToSchedules(week = 0) {
+        // Server-sent events replace refetching: reload only when the week changes
+        if (this.scheduleEvents || !window.EventSource) return;
+        
+        this.scheduleEvents = new EventSource(`/api/schedules/events?week=${week}`);
+        const reload = () => this.loadSchedules();
+        ['schedules_generated', 'schedules_repaired', 'schedule_updated', 'schedule_deleted'].forEach(type => {
+            this.scheduleEvents.addEventListener(type, reload);
+        });
+    }
+
+    unsubscribeFromSchedules() {
+        if (this.scheduleEvents) {
+            this.scheduleEvents.close();
+            this.scheduleEvents = null;
+        }
+    }
+
     async loadEmployees() {
         if (!this.currentUser || this.currentUser.role !== 'admin') return;
         
@@ -201,11 +230,8 @@ class ShiftSchedulerApp {
             const data = await response.json();
             
             if (data.success) {
+                // The schedules page reloads itself from its event subscription
                 this.showSuccess(data.message);
-                // Reload schedules if on schedules page
-                if (this.currentPage === 'schedules') {
-                    this.loadSchedules();
-                }
             } else {
                 this.showError('general-error', data.message);
             }
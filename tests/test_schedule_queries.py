@@ -0,0 +1,62 @@
+"""
+The schedule listings must load a populated week in one SELECT, however
+many employees it has; the old lazy-loaded Schedule.user issued one per row.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app import (
+    app, db, response_cache, User, get_week_dates, round_robin_schedules, save_generated_schedules,
+    DEFAULT_SHIFT_DEFINITIONS
+)
+
+@pytest.fixture(scope='module')
+def client():
+    with app.app_context():
+        db.create_all()
+        users = [
+            User(username=f'user{i}', name=f'User {i}', email=f'user{i}@example.com', password_hash='x',
+                 role='employee')
+            for i in range(30)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        
+        week_start, week_end = get_week_dates(0)
+        schedules = []
+        for offset in range(0, len(users), 3):
+            rotated = users[offset:] + users[:offset]
+            schedules.extend(round_robin_schedules(rotated, week_start, DEFAULT_SHIFT_DEFINITIONS,
+                                                   list(DEFAULT_SHIFT_DEFINITIONS)))
+        save_generated_schedules(week_start, week_end, schedules)
+        yield app.test_client()
+        db.drop_all()
+
+def count_selects(client, url):
+    """SELECTs issued while serving `url` with a cold response cache"""
+    response_cache.clear()
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+    
+    event.listen(db.engine, 'after_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+def test_schedules_single_select(client):
+    selects, body = count_selects(client, '/api/schedules?week=0')
+    assert len(body['schedules']) > 30
+    assert all(schedule['user_name'] for schedule in body['schedules'])
+    assert selects == 1
+
+def test_schedule_rows_single_select(client):
+    selects, body = count_selects(client, '/api/schedules/rows?week=0')
+    assert body
+    assert selects == 1